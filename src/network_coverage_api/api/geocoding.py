@@ -1,17 +1,60 @@
-from pyproj import Transformer
-from geopy.geocoders import BANFrance
-from geopy import Location, Point
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+import numpy as np
 from network_coverage_api.api.schemas import Address
+from network_coverage_api.api.single_flight import SingleFlight
 from network_coverage_api.utils import get_logger, timeit
-from geopy.exc import GeocoderServiceError
+from network_coverage_api.config import settings
+
+if TYPE_CHECKING:
+    from geopy import Location
+    from geopy.geocoders import BANFrance
+    from pyproj import Transformer
+
+# geopy (which imports all its geocoders) and pyproj are imported on first use
+# to keep them out of the API startup time.
 
 logger = get_logger()
 
+# Concurrent lookups of the same address or coordinates share one BAN request
+geocode_flight = SingleFlight("geocode")
+geocode_reverse_flight = SingleFlight("geocode_reverse")
+
+
+def create_geocoder() -> "BANFrance":
+    """Create a BANFrance geocoder for the address API set in settings.toml config.
+    The `ban_domain` and `ban_scheme` settings can be overridden with the DYNACONF_BAN_DOMAIN
+    and DYNACONF_BAN_SCHEME environment variables, e.g. to use a local fake server.
+    """
+    from geopy.geocoders import BANFrance
+
+    return BANFrance(domain=settings.ban_domain, scheme=settings.ban_scheme)
+
+
+def geocode(address: Address, n_tries: int = 5) -> "Location | None":
+    """Get GPS coordinates for the given address, waiting for the in-flight lookup of the same address if any."""
+    return geocode_flight.do(
+        (address.full_address, n_tries), _geocode, address, n_tries
+    )
+
+
+def geocode_reverse(
+    latitude: float, longitude: float, n_tries: int = 5
+) -> "Location | None":
+    """Find an address for the given latitude and longitude coordinates, waiting for the in-flight lookup
+    of the same coordinates if any."""
+    return geocode_reverse_flight.do(
+        (latitude, longitude, n_tries), _geocode_reverse, latitude, longitude, n_tries
+    )
+
 
 @timeit
-def geocode(address: Address, n_tries: int = 5) -> Location | None:
+def _geocode(address: Address, n_tries: int = 5) -> "Location | None":
     """Get GPS coordinates for the given address"""
-    geocoder = BANFrance()
+    from geopy.exc import GeocoderServiceError
+
+    geocoder = create_geocoder()
     for _ in range(n_tries):
         try:
             result = geocoder.geocode(address.full_address, exactly_one=False)
@@ -26,11 +69,14 @@ def geocode(address: Address, n_tries: int = 5) -> Location | None:
 
 
 @timeit
-def geocode_reverse(
+def _geocode_reverse(
     latitude: float, longitude: float, n_tries: int = 5
-) -> Location | None:
+) -> "Location | None":
     """Find an address for the given latitude and longitude coordinates."""
-    geocoder = BANFrance()
+    from geopy import Point
+    from geopy.exc import GeocoderServiceError
+
+    geocoder = create_geocoder()
     for _ in range(n_tries):
         try:
             result = geocoder.reverse(Point(latitude, longitude), exactly_one=False)
@@ -44,13 +90,21 @@ def geocode_reverse(
             )
 
 
-def lambert93_to_gps(x: float, y: float):
-    """
-    Convert a Lambert93 coordinates into GPS coordinates.
+@lru_cache(maxsize=1)
+def get_lambert93_transformer() -> "Transformer":
+    """Create a Lambert93 to GPS coordinates transformer, shared by all conversions.
     For ESPG codes see docs: https://spatialreference.org/
     """
+    from pyproj import Transformer
+
     LAMBERT93_CODE = "EPSG:2154"
     WGS84_CODE = "EPSG:4326"
-    transformer = Transformer.from_crs(LAMBERT93_CODE, WGS84_CODE, always_xy=True)
-    longitude, latitude = transformer.transform(x, y)
+    return Transformer.from_crs(LAMBERT93_CODE, WGS84_CODE, always_xy=True)
+
+
+def lambert93_to_gps(x: float | np.ndarray, y: float | np.ndarray):
+    """
+    Convert a Lambert93 coordinates into GPS coordinates. Accepts scalars or arrays.
+    """
+    longitude, latitude = get_lambert93_transformer().transform(x, y)
     return longitude, latitude
@@ -1,9 +1,45 @@
-import uvicorn
-from fastapi import FastAPI
-from network_coverage_api.api.network_coverage_router import NetworkCoverageRouter
+import math
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from network_coverage_api.api.network_coverage_router import (
+    NetworkCoverageRouter,
+    prerender_tiles,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    prerender_tiles()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def _replace_non_finite(value):
+    """Replace the non-finite floats (JSON bodies may contain Infinity and NaN) by their string
+    representation, as they cannot be encoded as JSON."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _replace_non_finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_replace_non_finite(item) for item in value]
+    return value
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    """The default validation error response, which echoes the invalid inputs."""
+    return JSONResponse(
+        status_code=422,
+        content={"detail": _replace_non_finite(jsonable_encoder(exc.errors()))},
+    )
 
-app = FastAPI()
 
 app.include_router(
     NetworkCoverageRouter,
@@ -12,6 +48,8 @@ app.include_router(
 )
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "network_coverage_api.api.main:app",
         host="127.0.0.1",
@@ -1,30 +1,58 @@
-from typing import Annotated
+import threading
+from typing import Annotated, Dict
 
-from fastapi import APIRouter, Query
+import numpy as np
+
+from fastapi import APIRouter, Header, HTTPException, Path, Query, Response
 from typing import List
 from network_coverage_api.utils import get_logger
+from network_coverage_api.config import settings
 from network_coverage_api.api.schemas import (
     Address,
     Operator,
     NetworkCoverage,
     NetworkCoverageDetailed,
     Location,
+    AreaNetworkCoverage,
+    Technology,
+    RouteRequest,
+    RouteNetworkCoverage,
+    CoverageSegment,
+    CoalescingMetrics,
 )
-from network_coverage_api.api.geocoding import geocode, geocode_reverse
-from network_coverage_api.map_engine.map_searcher import MapPoint, create_map_searcher
-from network_coverage_api.map_engine.map_data import MapData
-
+from network_coverage_api.api.geocoding import (
+    geocode,
+    geocode_reverse,
+    geocode_flight,
+    geocode_reverse_flight,
+)
+from network_coverage_api.api.single_flight import SingleFlight
+from network_coverage_api.map_engine.map_searcher import (
+    MapPoint,
+    MapPointData,
+    create_map_searcher,
+)
+from network_coverage_api.map_engine.map_data import MapData, AreaData
+from network_coverage_api.map_engine.tile_renderer import TileRenderer, MAX_ZOOM
+from network_coverage_api.map_engine.route_profile import RouteProfiler, parse_gpx
 
 logger = get_logger()
 NetworkCoverageRouter = APIRouter()
 map_data = MapData()
+area_data = AreaData()
+tile_renderer = TileRenderer(map_data)
+route_profiler = RouteProfiler(map_data)
+search_flight = SingleFlight("search")
 
 POSTAL_CODE_PATTERN = r"^(?:0[1-9]|[1-8]\d|9[0-8])\d{3}$"
+# Postal codes or INSEE commune codes (Corsican communes are 2A/2B), see area_code_property
+AREA_CODE_PATTERN = r"^(?:\d{5}|2[AB]\d{3})$"
 STREET_NUMBER_PATTERN = r"^[1-9]\d*\w*$"
+OPERATOR_PATTERN = "^(" + "|".join(operator.name for operator in Operator) + ")$"
 
 
 @NetworkCoverageRouter.get("/", response_model=List[NetworkCoverage])
-async def get_network_coverage(
+def get_network_coverage(
     street_number: Annotated[str | None, Query(pattern=STREET_NUMBER_PATTERN)] = None,
     street_name: str | None = None,
     postal_code: Annotated[str | None, Query(pattern=POSTAL_CODE_PATTERN)] = None,
@@ -41,7 +69,7 @@ async def get_network_coverage(
 
 
 @NetworkCoverageRouter.get("/detailed/", response_model=List[NetworkCoverageDetailed])
-async def get_detailed_network_coverage(
+def get_detailed_network_coverage(
     street_number: Annotated[str | None, Query(pattern=STREET_NUMBER_PATTERN)] = None,
     street_name: str | None = None,
     postal_code: Annotated[str | None, Query(pattern=POSTAL_CODE_PATTERN)] = None,
@@ -58,6 +86,166 @@ async def get_detailed_network_coverage(
     return _get_network_coverage(address, detailed=True)
 
 
+@NetworkCoverageRouter.get(
+    "/area/{area_code}", response_model=List[AreaNetworkCoverage]
+)
+def get_area_network_coverage(
+    area_code: Annotated[str, Path(pattern=AREA_CODE_PATTERN)],
+):
+    """Get precomputed network coverage aggregates for a postal code or commune area without geocoding."""
+    try:
+        area_coverage = _get_area_network_coverage(area_code)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=503,
+            detail="Area aggregates are not built, "
+            "run network_coverage_api.map_engine.area_preprocessor.build_area_data",
+        )
+    if area_coverage is None:
+        raise HTTPException(
+            status_code=404, detail=f"No coverage data for area {area_code}"
+        )
+    return area_coverage
+
+
+@NetworkCoverageRouter.get(
+    "/tiles/{operator}/{technology}/{z}/{x}/{y}.png",
+    response_class=Response,
+    responses={200: {"content": {"image/png": {}}}},
+)
+def get_coverage_tile(
+    operator: Annotated[str, Path(pattern=OPERATOR_PATTERN)],
+    technology: Technology,
+    z: Annotated[int, Path(ge=0, le=MAX_ZOOM)],
+    x: Annotated[int, Path(ge=0)],
+    y: Annotated[int, Path(ge=0)],
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    """Get an XYZ map tile (PNG) of the operator coverage for the technology.
+    The tile URL does not change with the data, so clients must revalidate the tile with its ETag
+    (the dataset version): 304 is returned if it did not change."""
+    if x >= 1 << z or y >= 1 << z:
+        raise HTTPException(status_code=404, detail=f"Tile {z}/{x}/{y} does not exist")
+    etag = f'"{map_data.get_dataset_version()}"'
+    headers = {"Cache-Control": "public, no-cache", "ETag": etag}
+    if if_none_match is not None and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    content = tile_renderer.get_tile(Operator[operator], technology.value, z, x, y)
+    return Response(content=content, media_type="image/png", headers=headers)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check if the If-None-Match header value matches the ETag (weak comparison)."""
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+@NetworkCoverageRouter.post("/route", response_model=List[RouteNetworkCoverage])
+def get_route_network_coverage(route: RouteRequest):
+    """Get the network coverage profile along a polyline or a GPX track: for each operator,
+    the consecutive route segments with the same 2G/3G/4G availability."""
+    try:
+        return _get_route_network_coverage(route)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@NetworkCoverageRouter.get(
+    "/metrics/coalescing", response_model=List[CoalescingMetrics]
+)
+async def get_coalescing_metrics():
+    """Get the counters of the coalesced geocoding and search calls, with the number of requests
+    waiting for each in-flight call."""
+    return [
+        CoalescingMetrics(**flight.get_metrics())
+        for flight in (geocode_flight, geocode_reverse_flight, search_flight)
+    ]
+
+
+def prerender_tiles() -> None:
+    """Render the low zoom tiles in the background, set tile_prerender_max_zoom to -1 to disable it."""
+    max_zoom = settings.tile_prerender_max_zoom
+    if max_zoom >= 0:
+        threading.Thread(
+            target=tile_renderer.prerender, args=(max_zoom,), daemon=True
+        ).start()
+
+
+def _get_area_network_coverage(area_code: str) -> List[AreaNetworkCoverage] | None:
+    """Retrieve the precomputed network coverage aggregates for the specified postal code or commune.
+
+    Returns:
+        List[AreaNetworkCoverage] | None: The coverage aggregates for each operator,
+            None if the area code is unknown.
+    """
+    records = area_data.get_area_coverage(area_code)
+    if records is None:
+        return None
+    return [
+        AreaNetworkCoverage(
+            operator=Operator[record["operator"]],
+            sites=record["sites"],
+            N2G_sites=record["2G_sites"],
+            N3G_sites=record["3G_sites"],
+            N4G_sites=record["4G_sites"],
+            N4G_share=record["4G_share"],
+            N2G_distance=record["2G_distance"],
+            N3G_distance=record["3G_distance"],
+            N4G_distance=record["4G_distance"],
+        )
+        for record in records
+    ]
+
+
+def _get_route_network_coverage(route: RouteRequest) -> List[RouteNetworkCoverage]:
+    """Compute the network coverage profile of each operator along the route.
+
+    Raises:
+        ValueError: If the GPX content is invalid, max_distance_km exceeds route_max_site_distance_km_limit
+            or the route needs more than route_max_samples samples.
+    """
+    points = parse_gpx(route.gpx) if route.gpx is not None else np.array(route.polyline)
+    spacing_km = route.spacing_km or settings.route_sample_spacing_km
+    max_distance_km = route.max_distance_km or settings.route_max_site_distance_km
+    # The cost of the site search grows with the square of max_distance_km
+    if max_distance_km > settings.route_max_site_distance_km_limit:
+        raise ValueError(
+            f"max_distance_km must not exceed {settings.route_max_site_distance_km_limit} km"
+        )
+    coverage = route_profiler.get_route_coverage(
+        points, spacing_km, max_distance_km, max_samples=settings.route_max_samples
+    )
+    return [
+        RouteNetworkCoverage(
+            operator=operator,
+            segments=[
+                CoverageSegment(
+                    start_km=run.start_km,
+                    end_km=run.end_km,
+                    N2G=run.coverage["2G"],
+                    N3G=run.coverage["3G"],
+                    N4G=run.coverage["4G"],
+                )
+                for run in runs
+            ],
+        )
+        for operator, runs in coverage.items()
+    ]
+
+
+def _find_closest_sites(
+    target_point: MapPoint,
+) -> Dict[Operator, MapPointData | None]:
+    """Find the closest site of each operator to the target point."""
+    searcher = create_map_searcher()
+    return {
+        operator: searcher.find_closest_point_data(
+            target_point, map_data.get_operator_data(operator)
+        )
+        for operator in Operator
+    }
+
+
 def _get_network_coverage(
     address: Address, detailed: bool = False
 ) -> List[NetworkCoverage]:
@@ -80,11 +268,11 @@ def _get_network_coverage(
         return result
 
     target_point = MapPoint(latitude=location.latitude, longitude=location.longitude)
-    searcher = create_map_searcher()
+    closest_sites = search_flight.do(
+        (location.latitude, location.longitude), _find_closest_sites, target_point
+    )
 
-    for operator in Operator:
-        data = map_data.get_operator_data(operator)
-        closest_data = searcher.find_closest_point_data(target_point, data)
+    for operator, closest_data in closest_sites.items():
         logger.info(f"Network coverage for {target_point}: {closest_data}")
         if closest_data is None:
             logger.info(f"No {operator.name} data found for {address}")
@@ -1,6 +1,8 @@
 from enum import Enum
 from dataclasses import dataclass
-from pydantic import BaseModel, Field, field_serializer
+from typing import Annotated, Dict, List, Tuple
+
+from pydantic import BaseModel, Field, field_serializer, model_validator
 
 
 @dataclass
@@ -28,6 +30,14 @@ class Operator(Enum):
     Bouygue = 20820
 
 
+class Technology(Enum):
+    """Network technology."""
+
+    N2G = "2G"
+    N3G = "3G"
+    N4G = "4G"
+
+
 class NetworkCoverage(BaseModel):
     """Base network coverage data."""
 
@@ -64,3 +74,101 @@ class NetworkCoverageDetailed(NetworkCoverage):
     distance: float
     closest_location: Location = None
     target_location: Location = None
+
+
+class AreaNetworkCoverage(BaseModel):
+    """Precomputed network coverage aggregates of an operator for a postal code or commune area.
+
+    Attributes:
+        sites (int): The number of operator sites located in the area.
+        N2G_sites, N3G_sites, N4G_sites (int): The number of area sites providing 2G/3G/4G.
+        N4G_share (float): The share of area sites providing 4G.
+        N2G_distance, N3G_distance, N4G_distance (float, optional): The distance in km from the area
+            centroid to the closest 2G/3G/4G site.
+    """
+
+    operator: Operator
+    sites: int
+    N2G_sites: int = Field(serialization_alias="2G_sites")
+    N3G_sites: int = Field(serialization_alias="3G_sites")
+    N4G_sites: int = Field(serialization_alias="4G_sites")
+    N4G_share: float = Field(serialization_alias="4G_share")
+    N2G_distance: float | None = Field(default=None, serialization_alias="2G_distance")
+    N3G_distance: float | None = Field(default=None, serialization_alias="3G_distance")
+    N4G_distance: float | None = Field(default=None, serialization_alias="4G_distance")
+
+    @field_serializer("operator")
+    def serialize_group(self, operator: Operator, _info):
+        return operator.name
+
+
+Latitude = Annotated[float, Field(ge=-90, le=90, allow_inf_nan=False)]
+Longitude = Annotated[float, Field(ge=-180, le=180, allow_inf_nan=False)]
+
+
+class RouteRequest(BaseModel):
+    """Route for which the coverage profile is requested, given either as a polyline or a GPX track.
+
+    Attributes:
+        polyline (List[Tuple[float, float]], optional): The (latitude, longitude) route points.
+        gpx (str, optional): The GPX document of the route track.
+        spacing_km (float, optional): The distance between two route samples, route_sample_spacing_km
+            from the settings by default.
+        max_distance_km (float, optional): The maximal distance to a site providing a technology for it
+            to be available, route_max_site_distance_km from the settings by default.
+    """
+
+    polyline: List[Tuple[Latitude, Longitude]] | None = None
+    gpx: str | None = None
+    spacing_km: float | None = Field(default=None, gt=0, allow_inf_nan=False)
+    max_distance_km: float | None = Field(default=None, gt=0, allow_inf_nan=False)
+
+    @model_validator(mode="after")
+    def check_route(self):
+        if (self.polyline is None) == (self.gpx is None):
+            raise ValueError("Exactly one of polyline and gpx must be provided")
+        if self.polyline is not None and len(self.polyline) < 2:
+            raise ValueError("The polyline needs at least two points")
+        return self
+
+
+class CoverageSegment(BaseModel):
+    """Route segment with the same network availability, from start_km to end_km along the route."""
+
+    start_km: float
+    end_km: float
+    N2G: bool = Field(serialization_alias="2G")
+    N3G: bool = Field(serialization_alias="3G")
+    N4G: bool = Field(serialization_alias="4G")
+
+
+class RouteNetworkCoverage(BaseModel):
+    """Network coverage profile of an operator along a route, as consecutive segments."""
+
+    operator: Operator
+    segments: List[CoverageSegment]
+
+    @field_serializer("operator")
+    def serialize_group(self, operator: Operator, _info):
+        return operator.name
+
+
+class CoalescingMetrics(BaseModel):
+    """Counters of the concurrent identical calls coalesced into one execution.
+
+    Attributes:
+        name (str): The coalesced operation: geocode, geocode_reverse or search.
+        calls (int): The number of calls.
+        executions (int): The number of calls actually executed.
+        coalesced (int): The number of calls which waited for an identical in-flight call.
+        max_waiters (int): The maximal number of calls which shared one execution.
+        in_flight (Dict[str, int]): The number of calls waiting for each in-flight key, by key hash
+            (see SingleFlight.get_key_hash) so that the addresses and coordinates are not exposed.
+    """
+
+    name: str
+    calls: int
+    executions: int
+    coalesced: int
+    max_waiters: int
+    in_flight: Dict[str, int]
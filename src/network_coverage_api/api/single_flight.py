@@ -0,0 +1,92 @@
+"""Single-flight coalescing of identical in-flight calls.
+
+During traffic bursts many concurrent requests ask for the same address at the same moment. A `SingleFlight`
+runs the first call for a key and makes the concurrent callers with the same key wait for its result instead
+of repeating it, so one BAN request or site search serves all of them.
+"""
+
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable
+
+from network_coverage_api.utils import get_logger
+
+logger = get_logger()
+
+
+class SingleFlight:
+    """Coalesces the concurrent calls with the same key into one execution shared by all the callers.
+
+    Attributes:
+        name (str): The name of the coalesced operation, used in the metrics.
+        calls (int): The number of calls.
+        executions (int): The number of calls actually executed, the others waited for an in-flight call.
+        max_waiters (int): The maximal number of callers which shared one execution.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.in_flight: Dict[Hashable, Future] = dict()
+        self.waiters: Dict[Hashable, int] = dict()
+        self.calls = 0
+        self.executions = 0
+        self.max_waiters = 0
+
+    def do(self, key: Hashable, function: Callable, *args, **kwargs):
+        """Call function(*args, **kwargs), or wait for the result of the in-flight call with the same key.
+        The exception raised by the call is raised in all its callers.
+        """
+        with self.lock:
+            self.calls += 1
+            future = self.in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self.in_flight[key] = future
+                self.waiters[key] = 1
+                self.executions += 1
+            else:
+                self.waiters[key] += 1
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def _finish(self, key: Hashable) -> None:
+        # Later callers start a new call, the waiters keep the future of this one
+        with self.lock:
+            del self.in_flight[key]
+            waiters = self.waiters.pop(key)
+            self.max_waiters = max(self.max_waiters, waiters)
+        if waiters > 1:
+            logger.info(f"{self.name}: {waiters} calls coalesced for {key}")
+
+    @staticmethod
+    def get_key_hash(key: Hashable) -> str:
+        """Short hash identifying a key in the metrics without exposing it (addresses, coordinates)."""
+        return hashlib.sha256(repr(key).encode()).hexdigest()[:12]
+
+    def get_metrics(self) -> Dict:
+        """Get the call counters and the number of waiters of each in-flight key, by key hash."""
+        with self.lock:
+            return dict(
+                name=self.name,
+                calls=self.calls,
+                executions=self.executions,
+                coalesced=self.calls - self.executions,
+                max_waiters=self.max_waiters,
+                in_flight={
+                    self.get_key_hash(key): waiters
+                    for key, waiters in self.waiters.items()
+                },
+            )
@@ -1,8 +1,23 @@
-from dynaconf import Dynaconf
-
-settings = Dynaconf(
-    settings_files=[
-        "src/network_coverage_api/settings.toml",
-        "network_coverage_api/settings.toml",
-    ],
-)
+SETTINGS_FILES = [
+    "src/network_coverage_api/settings.toml",
+    "network_coverage_api/settings.toml",
+]
+
+
+class LazySettings:
+    """Dynaconf settings created on first access, so dynaconf is not imported at the API startup."""
+
+    def __init__(self):
+        self._settings = None
+
+    def __getattr__(self, name):
+        if name.startswith("__") or name == "_settings":
+            raise AttributeError(name)
+        if self._settings is None:
+            from dynaconf import Dynaconf
+
+            self._settings = Dynaconf(settings_files=SETTINGS_FILES)
+        return getattr(self._settings, name)
+
+
+settings = LazySettings()
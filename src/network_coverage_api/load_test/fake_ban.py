@@ -0,0 +1,194 @@
+"""Local fake of the BAN address API (api-adresse.data.gouv.fr) used by the load-test harness.
+
+The server answers the `/search/` and `/reverse/` endpoints used by `geopy.geocoders.BANFrance`
+with a simulated latency and error rate, so the API can be loaded without hitting the real service.
+"""
+
+import json
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from network_coverage_api.utils import get_logger
+
+logger = get_logger()
+
+# Known locations (label, postal code, city, latitude, longitude) returned by the fake geocoder.
+SAMPLE_LOCATIONS = [
+    ("11 Rue des Archives 75004 Paris", "75004", "Paris", 48.857853, 2.354464),
+    ("Place du Carrousel 75001 Paris", "75001", "Paris", 48.861697, 2.333064),
+    ("Place Kléber 67000 Strasbourg", "67000", "Strasbourg", 48.583412, 7.745789),
+    ("Place Bellecour 69002 Lyon", "69002", "Lyon", 45.757814, 4.832011),
+    ("Quai du Port 13002 Marseille", "13002", "Marseille", 43.296482, 5.369780),
+    ("Place du Capitole 31000 Toulouse", "31000", "Toulouse", 43.604462, 1.444247),
+    ("Place de la Bourse 33000 Bordeaux", "33000", "Bordeaux", 44.841225, -0.569790),
+    ("Place Royale 44000 Nantes", "44000", "Nantes", 47.213679, -1.558789),
+    ("Grand Place 59000 Lille", "59000", "Lille", 50.636565, 3.063528),
+    (
+        "Avenue Charles de Gaulle 92200 Neuilly-sur-Seine",
+        "92200",
+        "Neuilly-sur-Seine",
+        48.884831,
+        2.268510,
+    ),
+]
+
+
+@dataclass
+class LatencyProfile:
+    """Simulated response time and failures of the fake BAN server.
+
+    Attributes:
+        base_ms (float): The minimal response time in milliseconds.
+        jitter_ms (float): The mean of an exponentially distributed delay added to `base_ms`.
+        tail_ms (float): An extra delay added to a `tail_rate` share of the responses.
+        tail_rate (float): The share of the responses with a tail delay.
+        error_rate (float): The share of the responses failing with a 503 status code.
+    """
+
+    base_ms: float = 0.0
+    jitter_ms: float = 0.0
+    tail_ms: float = 0.0
+    tail_rate: float = 0.0
+    error_rate: float = 0.0
+
+    def sample_delay(self, rng: random.Random) -> float:
+        """Sample a response delay in seconds."""
+        delay = self.base_ms
+        if self.jitter_ms > 0:
+            delay += rng.expovariate(1.0 / self.jitter_ms)
+        if rng.random() < self.tail_rate:
+            delay += self.tail_ms
+        return delay / 1000.0
+
+    def sample_error(self, rng: random.Random) -> bool:
+        return rng.random() < self.error_rate
+
+
+LATENCY_PROFILES = {
+    "instant": LatencyProfile(),
+    "typical": LatencyProfile(base_ms=20, jitter_ms=15, tail_ms=200, tail_rate=0.01),
+    "slow": LatencyProfile(base_ms=150, jitter_ms=100, tail_ms=800, tail_rate=0.05),
+    "degraded": LatencyProfile(
+        base_ms=50, jitter_ms=50, tail_ms=1500, tail_rate=0.05, error_rate=0.1
+    ),
+}
+
+
+def _feature(
+    label: str, postal_code: str, city: str, latitude: float, longitude: float
+):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [longitude, latitude]},
+        "properties": {
+            "label": label,
+            "score": 0.9,
+            "postcode": postal_code,
+            "city": city,
+            "type": "housenumber",
+        },
+    }
+
+
+def search_location(query: str) -> tuple:
+    """Map a search query onto a sample location: a known city or postal code is returned as is,
+    any other query is deterministically assigned to one of the sample locations.
+    """
+    for location in SAMPLE_LOCATIONS:
+        _, postal_code, city, _, _ = location
+        if postal_code in query or city.lower() in query.lower():
+            return location
+    return SAMPLE_LOCATIONS[zlib.crc32(query.encode()) % len(SAMPLE_LOCATIONS)]
+
+
+class FakeBANRequestHandler(BaseHTTPRequestHandler):
+    server: "FakeBANServer"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        profile = self.server.profile
+        time.sleep(profile.sample_delay(self.server.rng))
+        if profile.sample_error(self.server.rng):
+            self._send_json(503, {"message": "Service unavailable"})
+            return
+
+        path = url.path.rstrip("/")
+        if path == "/search":
+            query = params.get("q", [""])[0]
+            features = [_feature(*search_location(query))]
+        elif path == "/reverse":
+            latitude = float(params["lat"][0])
+            longitude = float(params["lon"][0])
+            label = f"Fake address {latitude:.4f} {longitude:.4f}"
+            features = [_feature(label, "00000", "Fake", latitude, longitude)]
+        else:
+            self._send_json(404, {"message": f"Unknown path {url.path}"})
+            return
+        self._send_json(200, {"type": "FeatureCollection", "features": features})
+
+    def _send_json(self, status: int, body: dict):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Fake BAN server: {format % args}")
+
+
+class FakeBANServer(ThreadingHTTPServer):
+    """Fake BAN address API served from a background thread.
+
+    Usage:
+        with FakeBANServer(LATENCY_PROFILES["typical"]) as server:
+            os.environ["DYNACONF_BAN_DOMAIN"] = server.domain
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        profile: LatencyProfile | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int | None = None,
+    ):
+        super().__init__((host, port), FakeBANRequestHandler)
+        self.profile = profile or LatencyProfile()
+        self.rng = random.Random(seed)
+        self._thread = None
+
+    @property
+    def domain(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+    def start(self) -> "FakeBANServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Fake BAN server listening on http://{self.domain}")
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeBANServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def handle_error(self, request, client_address):
+        # Clients giving up on a slow response (geocoder timeout) are expected under load
+        logger.debug(f"Fake BAN server: connection from {client_address} closed early")
@@ -0,0 +1,302 @@
+"""Load-test the network coverage API against a local fake BAN server.
+
+The runner starts a fake BAN geocoder (see `fake_ban.py`), launches the API with uvicorn pointed at it
+and sends requests at a fixed rate (open-loop) with a bounded number of in-flight requests.
+Throughput, p50/p95/p99 latency and error counts are reported per endpoint.
+
+Example:
+    python -m network_coverage_api.load_test.runner --rate 50 --duration 30 --workers 2 --profile typical
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field, replace
+from typing import Dict, List
+
+import httpx
+import numpy as np
+
+from network_coverage_api.load_test.fake_ban import (
+    FakeBANServer,
+    LatencyProfile,
+    LATENCY_PROFILES,
+    SAMPLE_LOCATIONS,
+)
+from network_coverage_api.utils import get_logger
+
+logger = get_logger()
+
+ENDPOINTS = {
+    "coverage": "/network_coverage/",
+    "detailed": "/network_coverage/detailed/",
+    "area": "/network_coverage/area/{area_code}",
+}
+
+
+@dataclass
+class LoadTestConfig:
+    """Load test parameters.
+
+    Attributes:
+        rate (float): The number of requests sent per second.
+        duration (float): The measured duration of the test in seconds.
+        warmup (float): The duration in seconds of a warmup phase excluded from the report.
+        concurrency (int): The maximal number of in-flight requests.
+        workers (int): The number of uvicorn worker processes.
+        endpoints (List[str]): The endpoint names (keys of ENDPOINTS) requested in a round-robin.
+        profile (LatencyProfile): The latency and error profile of the fake BAN server.
+        timeout (float): The request timeout in seconds.
+        seed (int, optional): The random seed of the fake BAN server.
+    """
+
+    rate: float = 20.0
+    duration: float = 10.0
+    warmup: float = 2.0
+    concurrency: int = 64
+    workers: int = 1
+    endpoints: List[str] = field(default_factory=lambda: ["coverage", "detailed"])
+    profile: LatencyProfile = field(default_factory=LatencyProfile)
+    timeout: float = 30.0
+    seed: int | None = 0
+
+
+@dataclass
+class RequestResult:
+    endpoint: str
+    scheduled_at: float
+    latency: float
+    status_code: int | None
+
+    @property
+    def is_error(self) -> bool:
+        return self.status_code is None or self.status_code >= 400
+
+
+@dataclass
+class EndpointReport:
+    endpoint: str
+    requests: int
+    errors: int
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+
+    def __str__(self) -> str:
+        return (
+            f"{self.endpoint:<10} {self.requests:>8} {self.errors:>7} {self.throughput:>10.1f} "
+            f"{self.p50:>9.1f} {self.p95:>9.1f} {self.p99:>9.1f}"
+        )
+
+
+REPORT_HEADER = (
+    f"{'endpoint':<10} {'requests':>8} {'errors':>7} {'req/s':>10} "
+    f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+)
+
+
+def build_report(results: List[RequestResult], duration: float) -> List[EndpointReport]:
+    """Aggregate the request results per endpoint. Latencies are reported in milliseconds."""
+    by_endpoint: Dict[str, List[RequestResult]] = dict()
+    for result in results:
+        by_endpoint.setdefault(result.endpoint, []).append(result)
+
+    reports = []
+    for endpoint, endpoint_results in by_endpoint.items():
+        latencies = np.array([result.latency for result in endpoint_results]) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        errors = sum(result.is_error for result in endpoint_results)
+        reports.append(
+            EndpointReport(
+                endpoint=endpoint,
+                requests=len(endpoint_results),
+                errors=errors,
+                throughput=(len(endpoint_results) - errors) / duration,
+                p50=p50,
+                p95=p95,
+                p99=p99,
+            )
+        )
+    return reports
+
+
+def build_request_url(endpoint: str, request_id: int) -> str:
+    _, postal_code, city, _, _ = SAMPLE_LOCATIONS[request_id % len(SAMPLE_LOCATIONS)]
+    if endpoint == "area":
+        return ENDPOINTS[endpoint].format(area_code=postal_code)
+    return ENDPOINTS[endpoint] + f"?postal_code={postal_code}&city={city}"
+
+
+async def _send_request(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    endpoint: str,
+    request_id: int,
+    scheduled_at: float,
+) -> RequestResult:
+    # The latency is measured from the scheduled send time, so the time spent waiting for
+    # a free slot is accounted for and a slow server does not hide its own queueing delay.
+    status_code = None
+    async with semaphore:
+        try:
+            response = await client.get(build_request_url(endpoint, request_id))
+            status_code = response.status_code
+        except httpx.HTTPError as e:
+            logger.debug(f"Request {request_id} to {endpoint} failed: {e}")
+    latency = time.perf_counter() - scheduled_at
+    return RequestResult(endpoint, scheduled_at, latency, status_code)
+
+
+async def drive_load(base_url: str, config: LoadTestConfig) -> List[RequestResult]:
+    """Send requests to the API at a fixed rate and collect the results of the measured phase."""
+    semaphore = asyncio.Semaphore(config.concurrency)
+    limits = httpx.Limits(max_connections=config.concurrency)
+    n_requests = int(config.rate * (config.warmup + config.duration))
+    interval = 1.0 / config.rate
+
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=config.timeout, limits=limits
+    ) as client:
+        start = time.perf_counter()
+        tasks = []
+        for request_id in range(n_requests):
+            scheduled_at = start + request_id * interval
+            await asyncio.sleep(max(0.0, scheduled_at - time.perf_counter()))
+            endpoint = config.endpoints[request_id % len(config.endpoints)]
+            tasks.append(
+                asyncio.create_task(
+                    _send_request(client, semaphore, endpoint, request_id, scheduled_at)
+                )
+            )
+        results = await asyncio.gather(*tasks)
+
+    measured_from = start + config.warmup
+    return [result for result in results if result.scheduled_at >= measured_from]
+
+
+def _get_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/openapi.json").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"API server at {base_url} did not start in {timeout} seconds")
+
+
+def start_api_server(
+    ban_domain: str, workers: int = 1, port: int | None = None
+) -> tuple:
+    """Launch the API with uvicorn in a subprocess, geocoding with the BAN server at `ban_domain`."""
+    port = port or _get_free_port()
+    env = dict(os.environ, DYNACONF_BAN_DOMAIN=ban_domain, DYNACONF_BAN_SCHEME="http")
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "network_coverage_api.api.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_until_ready(base_url, process)
+    except Exception:
+        process.terminate()
+        process.wait()
+        raise
+    return process, base_url
+
+
+def run_load_test(config: LoadTestConfig) -> List[EndpointReport]:
+    """Run a load test against a freshly started API and a fake BAN server."""
+    with FakeBANServer(config.profile, seed=config.seed) as ban_server:
+        process, base_url = start_api_server(ban_server.domain, workers=config.workers)
+        try:
+            logger.info(
+                f"Sending {config.rate} req/s for {config.duration}s to {base_url} "
+                f"with {config.workers} worker(s)"
+            )
+            results = asyncio.run(drive_load(base_url, config))
+        finally:
+            process.terminate()
+            process.wait()
+    return build_report(results, config.duration)
+
+
+def parse_args(args: List[str] | None = None) -> LoadTestConfig:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=20.0, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds measured")
+    parser.add_argument(
+        "--warmup", type=float, default=2.0, help="Seconds not measured"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=64, help="Max in-flight requests"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Uvicorn workers")
+    parser.add_argument(
+        "--endpoints",
+        nargs="+",
+        choices=list(ENDPOINTS),
+        default=["coverage", "detailed"],
+    )
+    parser.add_argument("--profile", choices=list(LATENCY_PROFILES), default="typical")
+    parser.add_argument("--latency-ms", type=float, help="Override the base latency")
+    parser.add_argument("--jitter-ms", type=float, help="Override the latency jitter")
+    parser.add_argument("--error-rate", type=float, help="Override the error rate")
+    parser.add_argument("--seed", type=int, default=0)
+    parsed = parser.parse_args(args)
+
+    profile = LATENCY_PROFILES[parsed.profile]
+    overrides = dict(
+        base_ms=parsed.latency_ms,
+        jitter_ms=parsed.jitter_ms,
+        error_rate=parsed.error_rate,
+    )
+    profile = replace(
+        profile, **{key: value for key, value in overrides.items() if value is not None}
+    )
+    return LoadTestConfig(
+        rate=parsed.rate,
+        duration=parsed.duration,
+        warmup=parsed.warmup,
+        concurrency=parsed.concurrency,
+        workers=parsed.workers,
+        endpoints=parsed.endpoints,
+        profile=profile,
+        seed=parsed.seed,
+    )
+
+
+if __name__ == "__main__":
+    reports = run_load_test(parse_args())
+    print(REPORT_HEADER)
+    for report in reports:
+        print(report)
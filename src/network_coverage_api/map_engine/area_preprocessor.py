@@ -0,0 +1,221 @@
+"""Aggregate the clustered operator datasources by postal code or commune area:
+1. Load the area boundaries from a GeoJSON file (e.g. the postal code or commune contours from data.gouv.fr)
+2. Join every site from <Operator>_datasource.csv to the area containing it
+3. Compute per-operator, per-technology aggregates and store them into area_datasource.csv
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+import pandas as pd
+from matplotlib.path import Path
+
+from network_coverage_api.api.schemas import Operator
+from network_coverage_api.config import settings
+from network_coverage_api.map_engine.map_data import MapData, AREA_DATASOURCE_FILE
+from network_coverage_api.map_engine.map_searcher import haversine_distance
+from network_coverage_api.map_engine.site_store import TECHNOLOGIES
+from network_coverage_api.utils import get_logger, timeit, get_data_path
+
+logger = get_logger()
+
+
+@dataclass
+class AreaBoundary:
+    """Area code with its polygons. Each polygon is a list of rings: the outer ring and its holes."""
+
+    code: str
+    polygons: List[List[Path]] = field(default_factory=list)
+
+    @property
+    def bounds(self) -> tuple:
+        """Bounding box of the area: (min_lon, min_lat, max_lon, max_lat)."""
+        vertices = np.concatenate([polygon[0].vertices for polygon in self.polygons])
+        min_lon, min_lat = vertices.min(axis=0)
+        max_lon, max_lat = vertices.max(axis=0)
+        return min_lon, min_lat, max_lon, max_lat
+
+    @property
+    def centroid(self) -> tuple:
+        """Centroid (latitude, longitude) of the largest outer ring of the area."""
+        ring = max(
+            (polygon[0].vertices for polygon in self.polygons),
+            key=lambda vertices: abs(_ring_area(vertices)),
+        )
+        x, y = ring[:, 0], ring[:, 1]
+        cross = x[:-1] * y[1:] - x[1:] * y[:-1]
+        area = cross.sum() / 2
+        if area == 0:
+            return float(y.mean()), float(x.mean())
+        longitude = ((x[:-1] + x[1:]) * cross).sum() / (6 * area)
+        latitude = ((y[:-1] + y[1:]) * cross).sum() / (6 * area)
+        return float(latitude), float(longitude)
+
+    def contains(self, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        """Check which of the given points lie inside the area."""
+        points = np.column_stack([longitudes, latitudes])
+        inside = np.zeros(len(points), dtype=bool)
+        for outer, *holes in self.polygons:
+            in_polygon = outer.contains_points(points)
+            for hole in holes:
+                in_polygon &= ~hole.contains_points(points)
+            inside |= in_polygon
+        return inside
+
+
+def _ring_area(vertices: np.ndarray) -> float:
+    x, y = vertices[:, 0], vertices[:, 1]
+    return (x[:-1] * y[1:] - x[1:] * y[:-1]).sum() / 2
+
+
+def _closed_ring(coordinates: list) -> np.ndarray:
+    ring = np.asarray(coordinates, dtype=float)[:, :2]
+    if not np.array_equal(ring[0], ring[-1]):
+        ring = np.vstack([ring, ring[:1]])
+    return ring
+
+
+@timeit
+def load_boundaries(boundary_file: str, code_property: str) -> List[AreaBoundary]:
+    """Load the area polygons from a GeoJSON FeatureCollection with WGS84 coordinates.
+    Features sharing the same code are merged into one area.
+    """
+    with open(boundary_file, encoding="utf-8") as f:
+        features = json.load(f)["features"]
+
+    areas = dict()
+    for feature in features:
+        code = (feature.get("properties") or dict()).get(code_property)
+        if code is None:
+            logger.warning(f"Skipping feature without {code_property} property")
+            continue
+        # Numeric codes lose their leading zero (1000 for 01000)
+        code = str(code)
+        if code.isdigit():
+            code = code.zfill(5)
+        geometry = feature["geometry"]
+        if geometry["type"] == "Polygon":
+            polygons = [geometry["coordinates"]]
+        elif geometry["type"] == "MultiPolygon":
+            polygons = geometry["coordinates"]
+        else:
+            logger.warning(f"Skipping {geometry['type']} geometry for area {code}")
+            continue
+        area = areas.setdefault(code, AreaBoundary(code))
+        for polygon in polygons:
+            area.polygons.append([Path(_closed_ring(ring)) for ring in polygon])
+    logger.info(f"Loaded {len(areas)} areas from {boundary_file}")
+    return list(areas.values())
+
+
+@timeit
+def assign_areas(data: pd.DataFrame, areas: List[AreaBoundary]) -> pd.Series:
+    """Find the area containing each site. Sites outside of all areas get a missing value."""
+    latitudes = data["latitude"].to_numpy()
+    longitudes = data["longitude"].to_numpy()
+    order = np.argsort(longitudes, kind="stable")
+    sorted_longitudes = longitudes[order]
+
+    site_areas = np.full(len(data), None, dtype=object)
+    assigned = np.zeros(len(data), dtype=bool)
+    for area in areas:
+        min_lon, min_lat, max_lon, max_lat = area.bounds
+        start = np.searchsorted(sorted_longitudes, min_lon, side="left")
+        end = np.searchsorted(sorted_longitudes, max_lon, side="right")
+        candidates = order[start:end]
+        candidates = candidates[
+            (latitudes[candidates] >= min_lat) & (latitudes[candidates] <= max_lat)
+        ]
+        if len(candidates) == 0:
+            continue
+        inside = area.contains(latitudes[candidates], longitudes[candidates])
+        matched = candidates[inside]
+        matched = matched[~assigned[matched]]
+        site_areas[matched] = area.code
+        assigned[matched] = True
+    return pd.Series(site_areas, index=data.index, name="area")
+
+
+def nearest_distances(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    site_latitudes: np.ndarray,
+    site_longitudes: np.ndarray,
+    chunk_size: int = 256,
+) -> np.ndarray:
+    """For each point, compute the haversine distance in km to the closest site."""
+    if len(site_latitudes) == 0:
+        return np.full(len(latitudes), np.nan)
+    distances = np.empty(len(latitudes))
+    for start in range(0, len(latitudes), chunk_size):
+        end = start + chunk_size
+        distances[start:end] = haversine_distance(
+            latitudes[start:end, np.newaxis],
+            longitudes[start:end, np.newaxis],
+            site_latitudes[np.newaxis, :],
+            site_longitudes[np.newaxis, :],
+        ).min(axis=1)
+    return distances
+
+
+def compute_area_aggregates(
+    operator_data: pd.DataFrame, areas: List[AreaBoundary]
+) -> pd.DataFrame:
+    """Compute the coverage aggregates of one operator for every area:
+    site counts per technology, the share of 4G sites and the distance from the area centroid
+    to the closest site for each technology.
+    """
+    codes = [area.code for area in areas]
+    site_areas = assign_areas(operator_data, areas)
+    sites = operator_data.assign(area=site_areas.to_numpy()).dropna(subset=["area"])
+
+    grouped = sites.groupby("area")
+    result = pd.DataFrame(index=pd.Index(codes, name="area"))
+    result["sites"] = grouped.size().reindex(codes, fill_value=0)
+    for technology in TECHNOLOGIES:
+        result[f"{technology}_sites"] = (
+            grouped[technology].sum().reindex(codes, fill_value=0).astype(int)
+        )
+    result["4G_share"] = (
+        (result["4G_sites"] / result["sites"].where(result["sites"] > 0))
+        .fillna(0.0)
+        .round(decimals=4)
+    )
+
+    centroids = np.array([area.centroid for area in areas]).reshape(-1, 2)
+    for technology in TECHNOLOGIES:
+        covered = operator_data[operator_data[technology] == 1]
+        result[f"{technology}_distance"] = nearest_distances(
+            centroids[:, 0],
+            centroids[:, 1],
+            covered["latitude"].to_numpy(),
+            covered["longitude"].to_numpy(),
+        ).round(decimals=4)
+    return result
+
+
+@timeit
+def build_area_data(boundary_file: str, code_property: str | None = None) -> None:
+    """Compute the coverage aggregates for every operator and store them into area_datasource.csv."""
+    code_property = code_property or settings.area_code_property
+    areas = load_boundaries(boundary_file, code_property)
+
+    aggregates = []
+    for operator in Operator:
+        logger.info(f"Building area aggregates for {operator.name}")
+        operator_aggregates = compute_area_aggregates(
+            MapData.load_datasource(operator), areas
+        )
+        operator_aggregates.insert(0, "operator", operator.name)
+        aggregates.append(operator_aggregates)
+
+    area_data_path = get_data_path(AREA_DATASOURCE_FILE)
+    pd.concat(aggregates).sort_index(kind="stable").to_csv(str(area_data_path))
+
+
+if __name__ == "__main__":
+    import sys
+
+    build_area_data(sys.argv[1])
@@ -1,9 +1,30 @@
 """Preprocess the raw network coverage data from "2018_01_Sites_mobiles_2G_3G_4G_France_metropolitaine_L93.csv":
-1. Compute latitude and longitude coordinates and store the result into network_data_converted.csv
+1. Compute latitude and longitude coordinates and store the result of each operator into <Operator>_converted.csv
 2. Compute clusters for each network operator and store this data in <Operator>_datasource.csv
+
+The raw file is streamed in chunks converted and split by operator in parallel processes, the operators are
+clustered in parallel processes, each one reading only its own converted file. Each stage is keyed by a hash
+of its inputs (the raw file content, the cluster settings) stored in preprocessing_manifest.json: a stage is
+skipped if its key did not change and rebuilt otherwise.
 """
 
-from network_coverage_api.utils import get_logger, timeit, get_data_path
+import hashlib
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from network_coverage_api.utils import (
+    get_logger,
+    timeit,
+    get_data_path,
+    compute_file_hash,
+)
 from network_coverage_api.api.schemas import Operator
 from network_coverage_api.api.geocoding import lambert93_to_gps
 from network_coverage_api.map_engine.map_searcher import (
@@ -11,57 +32,203 @@ from network_coverage_api.map_engine.map_searcher import (
     MapPoint,
     MapConfig,
 )
-import pandas as pd
+from network_coverage_api.map_engine.site_store import TECHNOLOGIES
 from network_coverage_api.config import settings
 
 logger = get_logger()
 
+MANIFEST_FILE = "preprocessing_manifest.json"
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def get_preprocessed_data_path(operator: Operator) -> Path:
+    return get_data_path(f"{operator.name}_converted.csv")
+
+
+def compute_key(*parts) -> str:
+    """Compute a stage key from its JSON serializable inputs."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def load_manifest() -> Dict[str, str]:
+    manifest_path = get_data_path(MANIFEST_FILE)
+    if manifest_path.exists():
+        return json.loads(manifest_path.read_text())
+    return dict()
+
+
+def save_manifest(manifest: Dict[str, str]) -> None:
+    get_data_path(MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+
+
+def is_up_to_date(stage: str, key: str, outputs: List[Path]) -> bool:
+    """Check if the stage outputs have been built for the given key."""
+    return load_manifest().get(stage) == key and all(
+        output.exists() for output in outputs
+    )
+
+
+def mark_up_to_date(stage: str, key: str) -> None:
+    manifest = load_manifest()
+    manifest[stage] = key
+    save_manifest(manifest)
+
 
-def build_map_config(data: pd.DataFrame) -> MapConfig:
-    """Compute the map boarders. For the future use these values are stored in the
-    config file settings.toml.
+def _temporary_path(path: Path) -> Path:
+    return path.with_name(path.name + ".tmp")
+
+
+def convert_chunk(chunk: pd.DataFrame) -> Dict[Operator, pd.DataFrame]:
+    """Drop incomplete rows of a raw data chunk, compute its GPS coordinates and split it by operator.
+    The rows of unknown operators are dropped.
     """
-    left_corner = MapPoint(data["latitude"].min(), data["longitude"].min())
-    right_corner = MapPoint(data["latitude"].max(), data["longitude"].max())
-    return MapConfig(left_border=left_corner, right_border=right_corner)
+    chunk = chunk.dropna()
+    chunk = chunk.astype({"x": float, "y": float, **dict.fromkeys(TECHNOLOGIES, int)})
+    chunk = convert_coordinates(chunk)
+    return {operator: chunk.loc[chunk.index == operator.value] for operator in Operator}
 
 
 @timeit
-def get_preprocessed_data(raw_network_file: str) -> pd.DataFrame:
+def get_preprocessed_data(
+    raw_network_file: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: int | None = None,
+) -> str:
     """Load raw network data and compute latitude and longitude coordinates from the Lambert93 coordinates.
-    If the preprocessing has been already performed, load the preprocessed data from network_data_converted.csv file.
+    The raw file is read by chunks converted in parallel processes, the rows of each operator are appended
+    to <Operator>_converted.csv. If the raw file content did not change since the last run, the conversion
+    is skipped.
+
+    Returns:
+        str: The key of the preprocessed data.
     """
-    preprocessed_data_file = get_data_path("network_data_converted.csv")
-    if preprocessed_data_file.exists():
-        preprocessed_data = pd.read_csv(preprocessed_data_file, index_col=0)
-    else:
-        network_data_path = get_data_path(raw_network_file)
-        raw_data = pd.read_csv(str(network_data_path), sep=";", index_col=0)
-        raw_data.dropna(inplace=True)
-        preprocessed_data = convert_coordinates(raw_data)
-        preprocessed_data.to_csv(str(preprocessed_data_file))
-
-    return preprocessed_data
-
-
-def build_clustered_data(preprocessed_data: pd.DataFrame) -> pd.DataFrame:
-    """Compute the clusters for the given preprocessed data."""
-    config = build_map_config(preprocessed_data)
-
-    for operator in Operator:
-        logger.info(f"Building clusters for {operator.name}")
-        operator_data = preprocessed_data.loc[operator.value].copy()
-        searcher = MapSearcher(config, cluster_size=settings.CLUSTER_SIZE)
-        operator_data["cluster"] = operator_data.apply(
-            lambda row: searcher.get_cluster_id(
-                searcher.get_point_cluster(MapPoint(row.latitude, row.longitude))
-            ),
-            axis=1,
+    network_data_path = get_data_path(raw_network_file)
+    preprocessed_data_files = {
+        operator: get_preprocessed_data_path(operator) for operator in Operator
+    }
+    key = compute_key(compute_file_hash(network_data_path))
+    if is_up_to_date("preprocessed", key, list(preprocessed_data_files.values())):
+        logger.info("Converted operator data is up to date, skipping conversion")
+        return key
+
+    max_workers = max_workers or os.cpu_count()
+    temporary_files = {
+        operator: _temporary_path(path)
+        for operator, path in preprocessed_data_files.items()
+    }
+    written = set()
+
+    def write(operator_chunks: Dict[Operator, pd.DataFrame]) -> None:
+        # The first chunk of each operator is written with the header, even if empty
+        for operator, operator_chunk in operator_chunks.items():
+            header = operator not in written
+            operator_chunk.to_csv(
+                temporary_files[operator], mode="w" if header else "a", header=header
+            )
+            written.add(operator)
+
+    chunks = pd.read_csv(
+        str(network_data_path), sep=";", index_col=0, chunksize=chunk_size
+    )
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Keep a bounded number of chunks in flight and write them back in the input order
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(convert_chunk, chunk))
+            if len(pending) >= 2 * max_workers:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+    if len(written) < len(Operator):
+        # No chunk was read (no data rows): write header-only outputs
+        header = pd.read_csv(str(network_data_path), sep=";", index_col=0, nrows=0)
+        write(
+            {
+                operator: operator_chunk
+                for operator, operator_chunk in convert_chunk(header).items()
+                if operator not in written
+            }
+        )
+    for operator, temporary_file in temporary_files.items():
+        os.replace(temporary_file, preprocessed_data_files[operator])
+    mark_up_to_date("preprocessed", key)
+    return key
+
+
+def cluster_operator_data(
+    operator: Operator,
+    preprocessed_data_file: Path,
+    operator_data_file: Path,
+    config: MapConfig,
+    cluster_size: float,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> None:
+    """Compute the clusters for one operator, streaming its converted data by chunks."""
+    logger.info(f"Building clusters for {operator.name}")
+    searcher = MapSearcher(config, cluster_size=cluster_size)
+    temporary_file = _temporary_path(operator_data_file)
+    header = True
+    for operator_data in pd.read_csv(
+        preprocessed_data_file, index_col=0, chunksize=chunk_size
+    ):
+        operator_data["cluster"] = searcher.get_cluster_ids(
+            operator_data["latitude"], operator_data["longitude"]
         )
         operator_data.set_index("cluster", inplace=True)
+        operator_data.to_csv(temporary_file, mode="w" if header else "a", header=header)
+        header = False
+    os.replace(temporary_file, operator_data_file)
 
-        operator_data_path = get_data_path(f"{operator.name}_datasource.csv")
-        operator_data.to_csv(str(operator_data_path))
+
+@timeit
+def build_clustered_data(
+    preprocessed_key: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: int | None = None,
+) -> str:
+    """Compute the clusters of each operator in parallel processes and store them in <Operator>_datasource.csv.
+    The map borders and cluster size are taken from settings.toml. If neither them nor the preprocessed
+    data changed since the last run, the clustering is skipped.
+
+    Returns:
+        str: The key of the clustered data.
+    """
+    config = MapConfig(
+        left_border=MapPoint(settings.left_border_lat, settings.left_border_lon),
+        right_border=MapPoint(settings.right_border_lat, settings.right_border_lon),
+    )
+    cluster_size = settings.cluster_size
+    key = compute_key(
+        preprocessed_key,
+        cluster_size,
+        [config.left_border.latitude, config.left_border.longitude],
+        [config.right_border.latitude, config.right_border.longitude],
+    )
+    operator_files = {
+        operator: get_data_path(f"{operator.name}_datasource.csv")
+        for operator in Operator
+    }
+    if is_up_to_date("clustered", key, list(operator_files.values())):
+        logger.info("Operator datasources are up to date, skipping clustering")
+        return key
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                cluster_operator_data,
+                operator,
+                get_preprocessed_data_path(operator),
+                operator_data_file,
+                config,
+                cluster_size,
+                chunk_size,
+            )
+            for operator, operator_data_file in operator_files.items()
+        ]
+        for future in futures:
+            future.result()
+    mark_up_to_date("clustered", key)
+    return key
 
 
 @timeit
@@ -71,16 +238,24 @@ def convert_coordinates(network_data: pd.DataFrame) -> pd.DataFrame:
     """
     logger.info(f"Converting Lambert 93 data to GPS coordinates")
     df = network_data
-    df["gps"] = df[["x", "y"]].apply(lambda row: lambert93_to_gps(row.x, row.y), axis=1)
-    df.loc[:, "latitude"] = df["gps"].apply(lambda x: x[1]).round(decimals=4)
-    df.loc[:, "longitude"] = df["gps"].apply(lambda x: x[0]).round(decimals=4)
-    df.drop(axis=1, inplace=True, columns="gps")
+    longitudes, latitudes = lambert93_to_gps(df["x"].to_numpy(), df["y"].to_numpy())
+    df.loc[:, "latitude"] = np.round(latitudes, decimals=4)
+    df.loc[:, "longitude"] = np.round(longitudes, decimals=4)
     return df
 
 
+def run_preprocessing(
+    raw_network_file: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: int | None = None,
+) -> None:
+    """Run the preprocessing stages, rebuilding only the outdated ones."""
+    preprocessed_key = get_preprocessed_data(raw_network_file, chunk_size, max_workers)
+    build_clustered_data(preprocessed_key, chunk_size, max_workers)
+
+
 if __name__ == "__main__":
     data_source_filename = (
         "2018_01_Sites_mobiles_2G_3G_4G_France_metropolitaine_L93.csv"
     )
-    preprocessed_data = get_preprocessed_data(data_source_filename)
-    build_clustered_data(preprocessed_data)
+    run_preprocessing(data_source_filename)
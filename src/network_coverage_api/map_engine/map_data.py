@@ -1,23 +1,48 @@
+import hashlib
+import threading
+from typing import Dict, List
+
 import pandas as pd
-from matplotlib import pyplot as plt
 
 from network_coverage_api.api.schemas import Operator
-from network_coverage_api.utils import get_data_path
+from network_coverage_api.map_engine.site_store import SiteStore, OperatorSites
+from network_coverage_api.utils import get_data_path, compute_file_hash
+
+AREA_DATASOURCE_FILE = "area_datasource.csv"
 
 
 class MapData:
     """
-    Provides a clustered datasource for each operator.
+    Provides the sites of each operator from a compact site store shared by all operators.
     """
 
     def __init__(self):
-        self.operator_data = dict()
+        self.site_store = None
+        self.dataset_version = None
+        self.lock = threading.Lock()
+
+    def get_site_store(self) -> SiteStore:
+        with self.lock:
+            if self.site_store is None:
+                self.site_store = SiteStore.from_frames(
+                    {operator: self.load_datasource(operator) for operator in Operator}
+                )
+
+        return self.site_store
+
+    def get_operator_data(self, operator: Operator) -> OperatorSites:
+        return self.get_site_store().get_operator_sites(operator)
 
-    def get_operator_data(self, operator: Operator) -> pd.DataFrame:
-        if operator not in self.operator_data:
-            self.operator_data[operator] = self.load_datasource(operator)
+    def get_dataset_version(self) -> str:
+        """Get a short hash of the operator datasources content, identifying the served data."""
+        if self.dataset_version is None:
+            dataset_hash = hashlib.sha256()
+            for operator in Operator:
+                data_path = get_data_path(f"{operator.name}_datasource.csv")
+                dataset_hash.update(compute_file_hash(data_path).encode())
+            self.dataset_version = dataset_hash.hexdigest()[:16]
 
-        return self.operator_data[operator]
+        return self.dataset_version
 
     @staticmethod
     def load_datasource(operator: Operator) -> pd.DataFrame:
@@ -30,12 +55,47 @@ class MapData:
         return df
 
     def visualize_clusters(self, operator: Operator) -> None:
-        df = self.get_operator_data(operator)
+        from matplotlib import pyplot as plt
+
+        df = self.load_datasource(operator)
         df = df.reset_index()
         df.plot.scatter(x="longitude", y="latitude", c="cluster")
         plt.show()
 
 
+class AreaData:
+    """
+    Provides the precomputed coverage aggregates for each postal code or commune area.
+    """
+
+    def __init__(self):
+        self.area_data = None
+        self.lock = threading.Lock()
+
+    def get_area_coverage(self, area_code: str) -> List[dict] | None:
+        """Get the coverage aggregates of the area, None for an unknown area.
+        Raises FileNotFoundError if the area datasource has not been built.
+        """
+        with self.lock:
+            if self.area_data is None:
+                self.area_data = self.load_datasource()
+
+        return self.area_data.get(area_code)
+
+    @staticmethod
+    def load_datasource() -> Dict[str, List[dict]]:
+        data_path = get_data_path(AREA_DATASOURCE_FILE)
+        if data_path.exists():
+            df = pd.read_csv(data_path, dtype={"area": str})
+        else:
+            raise FileNotFoundError(f"Could not find {data_path}")
+        df = df.astype(object).where(df.notna(), None)
+        area_data = dict()
+        for record in df.to_dict(orient="records"):
+            area_data.setdefault(record.pop("area"), []).append(record)
+        return area_data
+
+
 if __name__ == "__main__":
     map_data = MapData()
     map_data.visualize_clusters(Operator.Free)
@@ -1,15 +1,35 @@
 import math
 from dataclasses import dataclass, astuple
 
+import numpy as np
 import pandas as pd
 from typing import List, Dict
 from network_coverage_api.utils import timeit, get_logger
-import geopy.distance
 from network_coverage_api.config import settings
+from network_coverage_api.map_engine.site_store import OperatorSites
 
 
 logger = get_logger()
 
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_distance(
+    latitude: float | np.ndarray,
+    longitude: float | np.ndarray,
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+) -> np.ndarray:
+    """Compute the great-circle distances in km between points, broadcasting the arguments."""
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon2 = np.radians(np.asarray(longitudes, dtype=np.float64))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
 
 @dataclass
 class MapPoint:
@@ -78,6 +98,18 @@ class MapSearcher:
         )
         return Cluster(row=cluster_row, column=cluster_col)
 
+    def get_cluster_ids(
+        self, latitudes: np.ndarray, longitudes: np.ndarray
+    ) -> np.ndarray:
+        """Vectorized version of get_cluster_id(get_point_cluster(point)) for many points."""
+        rows = (
+            np.asarray(latitudes) - self.map_config.left_border.latitude
+        ) // self.cluster_size
+        columns = (
+            np.asarray(longitudes) - self.map_config.left_border.longitude
+        ) // self.cluster_size
+        return (rows * self.col_num + columns).astype(np.int64)
+
     def get_border_distance(
         self,
         point: MapPoint,
@@ -136,49 +168,51 @@ class MapSearcher:
             clusters.append(Cluster(cluster.row, cluster.column - 1))
         return clusters
 
-    def get_point_neighbors(self, point: MapPoint, data: pd.DataFrame) -> List[dict]:
-        """Get neighbor data points for a target point."""
+    def get_point_neighbors(self, point: MapPoint, data: OperatorSites) -> np.ndarray:
+        """Get the positions of the neighbor sites for a target point."""
         cluster = self.get_point_cluster(point)
         logger.info(f"Point cluster: {cluster}, id: {self.get_cluster_id(cluster)}")
         neighbors = []
         target_clusters = self.get_target_clusters(point, cluster)
         for cluster in target_clusters:
             cluster_id = self.get_cluster_id(cluster)
-            if cluster_id in data.index:
-                df = data.loc[cluster_id]
+            start, end = data.get_cluster_range(cluster_id)
+            if end > start:
                 logger.info(
-                    f"Added {len(df)} points from the cluster {cluster}, cluster_id: {cluster_id}"
+                    f"Added {end - start} points from the cluster {cluster}, cluster_id: {cluster_id}"
                 )
-                if isinstance(df, pd.Series):
-                    neighbors += [df.to_dict()]
-                else:
-                    neighbors += df.to_dict(orient="records")
+                neighbors.append(np.arange(start, end))
+        neighbors = np.concatenate(neighbors) if neighbors else np.empty(0, dtype=int)
         logger.info(f"Points neighborhood contains: {len(neighbors)} points")
         return neighbors
 
     @timeit
     def find_closest_point_data(
-        self, point: MapPoint, data: pd.DataFrame
-    ) -> MapPointData:
-        """For a given point, find the closest point in the data."""
-        best_point, best_distance = None, None
+        self, point: MapPoint, data: OperatorSites
+    ) -> MapPointData | None:
+        """For a given point, find the closest point in the data.
+        The neighbors are scanned with a vectorized haversine distance, the geodesic distance
+        is then computed for the closest one.
+        """
+        import geopy.distance
+
         neighbors = self.get_point_neighbors(point, data)
-        for neighbor in neighbors:
-            neighbor_pos = (neighbor["latitude"], neighbor["longitude"])
-            distance = geopy.distance.distance(astuple(point), neighbor_pos).km
-            logger.debug(
-                f"Distance between: target: {point} and neighbor: {neighbor_pos}: {distance} km"
-            )
-            if best_point is None or distance < best_distance:
-                best_point = neighbor
-                best_distance = distance
+        if len(neighbors) == 0:
+            return None
+        latitudes, longitudes = data.get_coordinates(neighbors)
+        distances = haversine_distance(
+            point.latitude, point.longitude, latitudes, longitudes
+        )
+        best_point = data.get_site_data(neighbors[np.argmin(distances)])
+        best_position = (best_point["latitude"], best_point["longitude"])
+        best_distance = geopy.distance.distance(astuple(point), best_position).km
+        logger.debug(
+            f"Distance between: target: {point} and closest: {best_position}: {best_distance} km"
+        )
         return MapPointData(
             data=best_point,
             distance=best_distance,
-            point=MapPoint(
-                latitude=best_point.get("latitude"),
-                longitude=best_point.get("longitude"),
-            ),
+            point=MapPoint(latitude=best_position[0], longitude=best_position[1]),
         )
 
 
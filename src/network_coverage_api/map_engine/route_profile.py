@@ -0,0 +1,261 @@
+"""Compute the network coverage profile along a route (polyline or GPX track).
+
+The route is resampled at a regular spacing and all the samples are queried at once for each operator and
+technology against a grid index of the sites. A technology is available at a sample if a site providing it
+lies within `max_distance_km`. The profile is returned as runs of samples sharing the same availability.
+"""
+
+import math
+import threading
+import xml.etree.ElementTree as ElementTree
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from network_coverage_api.api.schemas import Operator
+from network_coverage_api.config import settings
+from network_coverage_api.map_engine.map_data import MapData
+from network_coverage_api.map_engine.map_searcher import haversine_distance
+from network_coverage_api.map_engine.site_store import TECHNOLOGIES, TECHNOLOGY_BITS
+from network_coverage_api.utils import get_logger, timeit
+
+logger = get_logger()
+
+KM_PER_DEGREE = 111.195
+# Maximal number of rings of neighbor cells scanned around a point: (2 * MAX_RING + 1) ** 2 cells
+MAX_RING = 16
+
+
+@dataclass
+class CoverageRun:
+    """Consecutive route samples with the same 2G/3G/4G availability."""
+
+    start_km: float
+    end_km: float
+    coverage: Dict[str, bool]
+
+
+def parse_gpx(content: str) -> np.ndarray:
+    """Extract the (latitude, longitude) points of the GPX tracks, or of its routes if it has no track."""
+    try:
+        root = ElementTree.fromstring(content)
+    except ElementTree.ParseError as e:
+        raise ValueError(f"Invalid GPX content: {e}")
+    # GPX 1.0 and 1.1 use different namespaces, match the local tag names only
+    for tag in ("trkpt", "rtept"):
+        try:
+            points = [
+                (float(element.attrib["lat"]), float(element.attrib["lon"]))
+                for element in root.iter()
+                if element.tag.rsplit("}", 1)[-1] == tag
+            ]
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Invalid GPX {tag} coordinates: {e}")
+        if points:
+            points = np.array(points)
+            check_coordinates(points)
+            return points
+    raise ValueError("GPX content has no track or route points")
+
+
+def check_coordinates(points: np.ndarray) -> None:
+    """Raise a ValueError if a (latitude, longitude) point is not finite or out of range."""
+    latitudes, longitudes = points[:, 0], points[:, 1]
+    valid = (
+        np.isfinite(points).all(axis=1)
+        & (np.abs(latitudes) <= 90)
+        & (np.abs(longitudes) <= 180)
+    )
+    if not valid.all():
+        invalid = np.flatnonzero(~valid)[0]
+        raise ValueError(
+            f"Invalid coordinates at point {invalid}: {points[invalid].tolist()}, "
+            "latitude must be in [-90, 90] and longitude in [-180, 180]"
+        )
+
+
+def resample_route(
+    points: np.ndarray, spacing_km: float, max_samples: int | None = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Resample the route at a regular spacing along its length, keeping its last point.
+    A ValueError is raised if the route needs more than max_samples samples.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The samples latitudes, longitudes and their
+            distances in km from the route start.
+    """
+    latitudes, longitudes = points[:, 0], points[:, 1]
+    lengths = haversine_distance(
+        latitudes[:-1], longitudes[:-1], latitudes[1:], longitudes[1:]
+    )
+    distances = np.concatenate([[0.0], np.cumsum(lengths)])
+    n_samples = math.ceil(distances[-1] / spacing_km) + 1
+    if max_samples is not None and n_samples > max_samples:
+        raise ValueError(
+            f"Route of {distances[-1]:.1f} km needs {n_samples} samples "
+            f"at {spacing_km} km spacing, the limit is {max_samples}"
+        )
+    samples = np.append(np.arange(0.0, distances[-1], spacing_km), distances[-1])
+    return (
+        np.interp(samples, distances, latitudes),
+        np.interp(samples, distances, longitudes),
+        samples,
+    )
+
+
+def run_length_encode(distances: np.ndarray, coverage: np.ndarray) -> List[CoverageRun]:
+    """Compress the per-sample availability (n_samples, n_technologies) into runs."""
+    changes = np.flatnonzero(np.any(coverage[1:] != coverage[:-1], axis=1)) + 1
+    starts = np.concatenate([[0], changes])
+    ends = np.concatenate([changes, [len(distances) - 1]])
+    return [
+        CoverageRun(
+            start_km=round(float(distances[start]), 3),
+            end_km=round(float(distances[end]), 3),
+            coverage=dict(zip(TECHNOLOGIES, map(bool, coverage[start]))),
+        )
+        for start, end in zip(starts, ends)
+    ]
+
+
+class SiteGridIndex:
+    """Sites bucketed in a regular latitude/longitude grid of cells at least `cell_km` wide,
+    answering radius queries for many points at once.
+    """
+
+    KEY_OFFSET = 1 << 31
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray, cell_km: float):
+        self.cell_km = cell_km
+        self.lat_step = cell_km / KM_PER_DEGREE
+        max_latitude = float(np.abs(latitudes).max()) if len(latitudes) else 0.0
+        max_latitude = min(max_latitude + self.lat_step, 89.0)
+        self.lon_step = self.lat_step / math.cos(math.radians(max_latitude))
+
+        keys = self.get_cell_keys(*self.get_cells(latitudes, longitudes))
+        order = np.argsort(keys, kind="stable")
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)[order]
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)[order]
+        self.cell_keys, starts = np.unique(keys[order], return_index=True)
+        self.cell_starts = starts
+        self.cell_ends = np.append(starts[1:], len(keys))
+
+    def get_cells(
+        self, latitudes: np.ndarray, longitudes: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        rows = np.floor(np.asarray(latitudes) / self.lat_step).astype(np.int64)
+        columns = np.floor(np.asarray(longitudes) / self.lon_step).astype(np.int64)
+        return rows, columns
+
+    def get_cell_keys(self, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        return (rows << 32) + (columns + self.KEY_OFFSET)
+
+    def nearest_distances(
+        self, latitudes: np.ndarray, longitudes: np.ndarray, max_distance_km: float
+    ) -> np.ndarray:
+        """For each point, the distance in km to the closest site if it is within max_distance_km,
+        infinity otherwise. A ValueError is raised if max_distance_km exceeds MAX_RING cells.
+        """
+        ring = math.ceil(max_distance_km / self.cell_km)
+        if ring > MAX_RING:
+            raise ValueError(
+                f"max_distance_km must not exceed {MAX_RING * self.cell_km} km "
+                f"with {self.cell_km} km grid cells"
+            )
+        result = np.full(len(latitudes), np.inf)
+        if len(self.cell_keys) == 0:
+            return result
+        rows, columns = self.get_cells(latitudes, longitudes)
+        for row_offset in range(-ring, ring + 1):
+            for column_offset in range(-ring, ring + 1):
+                keys = self.get_cell_keys(rows + row_offset, columns + column_offset)
+                cells = np.searchsorted(self.cell_keys, keys)
+                cells[cells == len(self.cell_keys)] = 0
+                found = np.flatnonzero(self.cell_keys[cells] == keys)
+                if len(found) == 0:
+                    continue
+                starts = self.cell_starts[cells[found]]
+                counts = self.cell_ends[cells[found]] - starts
+                # Pair each point with all the sites of its neighbor cell
+                segments = np.concatenate([[0], np.cumsum(counts)[:-1]])
+                sites = np.arange(counts.sum()) - np.repeat(segments - starts, counts)
+                points = np.repeat(found, counts)
+                distances = haversine_distance(
+                    latitudes[points],
+                    longitudes[points],
+                    self.latitudes[sites],
+                    self.longitudes[sites],
+                )
+                closest = np.minimum.reduceat(distances, segments)
+                result[found] = np.minimum(result[found], closest)
+        result[result > max_distance_km] = np.inf
+        return result
+
+
+class RouteProfiler:
+    """Computes the coverage profile of each operator along a route."""
+
+    def __init__(self, map_data: MapData, cell_km: float | None = None):
+        self.map_data = map_data
+        self._cell_km = cell_km
+        self.indexes: Dict[Tuple[Operator, str], SiteGridIndex] = dict()
+        self.lock = threading.Lock()
+
+    @property
+    def cell_km(self) -> float:
+        if self._cell_km is None:
+            self._cell_km = settings.route_grid_cell_km
+        return self._cell_km
+
+    def get_index(self, operator: Operator, technology: str) -> SiteGridIndex:
+        key = (operator, technology)
+        with self.lock:
+            if key not in self.indexes:
+                sites = self.map_data.get_operator_data(operator)
+                positions = np.flatnonzero(
+                    sites.technologies & TECHNOLOGY_BITS[technology]
+                )
+                self.indexes[key] = SiteGridIndex(
+                    *sites.get_coordinates(positions), self.cell_km
+                )
+        return self.indexes[key]
+
+    @timeit
+    def get_route_coverage(
+        self,
+        points: np.ndarray,
+        spacing_km: float,
+        max_distance_km: float,
+        max_samples: int | None = None,
+    ) -> Dict[Operator, List[CoverageRun]]:
+        """Compute the coverage runs of each operator along the route.
+
+        Args:
+            points (np.ndarray): The (latitude, longitude) route points.
+            spacing_km (float): The distance between two route samples.
+            max_distance_km (float): The maximal distance to a site providing a technology.
+            max_samples (int, optional): The maximal number of samples, a ValueError is raised
+                for longer routes.
+        """
+        if len(points) < 2:
+            raise ValueError("A route needs at least two points")
+        latitudes, longitudes, distances = resample_route(
+            points, spacing_km, max_samples
+        )
+        logger.info(f"Route of {distances[-1]:.1f} km: {len(distances)} samples")
+
+        result = dict()
+        for operator in Operator:
+            coverage = np.column_stack(
+                [
+                    np.isfinite(
+                        self.get_index(operator, technology).nearest_distances(
+                            latitudes, longitudes, max_distance_km
+                        )
+                    )
+                    for technology in TECHNOLOGIES
+                ]
+            )
+            result[operator] = run_length_encode(distances, coverage)
+        return result
@@ -0,0 +1,149 @@
+"""Compact in-memory store of the network sites shared by all operators.
+
+The operator datasources list many physical sites (masts) several times: once per operator using it.
+The store keeps a single deduplicated float32 coordinate table sorted by cluster, and for each operator
+the indices of its sites in this table with their 2G/3G/4G flags bit-packed into one byte.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from network_coverage_api.api.schemas import Operator
+
+TECHNOLOGIES = ["2G", "3G", "4G"]
+TECHNOLOGY_BITS = {technology: 1 << bit for bit, technology in enumerate(TECHNOLOGIES)}
+
+
+def pack_technologies(data: pd.DataFrame) -> np.ndarray:
+    """Pack the 2G/3G/4G flag columns into one byte per site."""
+    packed = np.zeros(len(data), dtype=np.uint8)
+    for technology, bit in TECHNOLOGY_BITS.items():
+        packed |= np.where(data[technology].to_numpy() != 0, bit, 0).astype(np.uint8)
+    return packed
+
+
+def unpack_technologies(packed: int) -> Dict[str, bool]:
+    """Unpack a technology byte into the 2G/3G/4G flags."""
+    return {
+        technology: bool(packed & bit) for technology, bit in TECHNOLOGY_BITS.items()
+    }
+
+
+@dataclass
+class OperatorSites:
+    """Sites of one operator sorted by cluster.
+
+    Attributes:
+        latitudes, longitudes (np.ndarray): The float32 coordinate table shared by all operators.
+        site_ids (np.ndarray): int32 indices of the sites in the store coordinate table.
+        technologies (np.ndarray): uint8 bit-packed 2G/3G/4G flags of the sites.
+        cluster_ids (np.ndarray): Sorted int32 ids of the clusters containing the sites.
+        cluster_offsets (np.ndarray): The sites of cluster_ids[i] are at positions
+            cluster_offsets[i]:cluster_offsets[i + 1].
+    """
+
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    site_ids: np.ndarray
+    technologies: np.ndarray
+    cluster_ids: np.ndarray
+    cluster_offsets: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.site_ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the operator indices, without the shared coordinate table."""
+        return (
+            self.site_ids.nbytes
+            + self.technologies.nbytes
+            + self.cluster_ids.nbytes
+            + self.cluster_offsets.nbytes
+        )
+
+    def get_cluster_range(self, cluster_id: int) -> Tuple[int, int]:
+        """Get the (start, end) positions of the cluster sites, (0, 0) for an empty cluster."""
+        i = np.searchsorted(self.cluster_ids, cluster_id)
+        if i == len(self.cluster_ids) or self.cluster_ids[i] != cluster_id:
+            return 0, 0
+        return int(self.cluster_offsets[i]), int(self.cluster_offsets[i + 1])
+
+    def get_coordinates(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the latitudes and longitudes of the sites at the given positions."""
+        site_ids = self.site_ids[positions]
+        return self.latitudes[site_ids], self.longitudes[site_ids]
+
+    def get_site_data(self, position: int) -> Dict:
+        """Get the coordinates and the 2G/3G/4G flags of the site at the given position."""
+        site_id = self.site_ids[position]
+        data = unpack_technologies(int(self.technologies[position]))
+        data["latitude"] = round(float(self.latitudes[site_id]), 4)
+        data["longitude"] = round(float(self.longitudes[site_id]), 4)
+        return data
+
+
+class SiteStore:
+    """Deduplicated float32 coordinate table with per-operator site indices."""
+
+    def __init__(
+        self,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        operator_sites: Dict[Operator, OperatorSites],
+    ):
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.operator_sites = operator_sites
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.latitudes.nbytes
+            + self.longitudes.nbytes
+            + sum(sites.nbytes for sites in self.operator_sites.values())
+        )
+
+    def get_operator_sites(self, operator: Operator) -> OperatorSites:
+        return self.operator_sites[operator]
+
+    @staticmethod
+    def from_frames(frames: Dict[Operator, pd.DataFrame]) -> "SiteStore":
+        """Build the store from the clustered operator datasources (indexed by cluster id)."""
+        operators = list(frames)
+        data = pd.concat(
+            [frames[operator].reset_index() for operator in operators],
+            keys=range(len(operators)),
+            names=["operator", None],
+        ).reset_index(level=0)
+
+        # Deduplicate the sites and sort the coordinate table by cluster, so that the sites of
+        # a cluster are contiguous in memory whatever the operator.
+        coordinates = data[["cluster", "latitude", "longitude"]]
+        unique, inverse = np.unique(
+            coordinates.to_numpy(dtype=np.float64), axis=0, return_inverse=True
+        )
+        data["site_id"] = inverse.reshape(-1).astype(np.int32)
+        latitudes = np.ascontiguousarray(unique[:, 1], dtype=np.float32)
+        longitudes = np.ascontiguousarray(unique[:, 2], dtype=np.float32)
+
+        operator_sites = dict()
+        for i, operator in enumerate(operators):
+            sites = data[data["operator"] == i].sort_values("site_id", kind="stable")
+            clusters = sites["cluster"].to_numpy(dtype=np.int32)
+            cluster_ids, cluster_starts = np.unique(clusters, return_index=True)
+            operator_sites[operator] = OperatorSites(
+                latitudes=latitudes,
+                longitudes=longitudes,
+                site_ids=sites["site_id"].to_numpy(dtype=np.int32),
+                technologies=pack_technologies(sites),
+                cluster_ids=cluster_ids.astype(np.int32),
+                cluster_offsets=np.append(cluster_starts, len(sites)).astype(np.int32),
+            )
+        return SiteStore(latitudes, longitudes, operator_sites)
@@ -0,0 +1,392 @@
+"""Render XYZ (Web Mercator) coverage map tiles from the in-memory site store.
+
+A tile shows the area within `tile_site_radius_km` of the sites providing a technology for an operator.
+The sites are rasterized with numpy (no per-point plotting) and encoded as RGBA PNG. Rendered tiles are
+kept in an in-memory LRU cache backed by a size-limited on-disk cache, both keyed by the dataset version: the
+tiles of the versions unused for `tile_cache_retention_hours` are removed from disk.
+"""
+
+import math
+import os
+import re
+import shutil
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+from network_coverage_api.api.schemas import Operator
+from network_coverage_api.config import settings
+from network_coverage_api.map_engine.map_data import MapData
+from network_coverage_api.map_engine.site_store import TECHNOLOGY_BITS
+from network_coverage_api.utils import get_logger, timeit
+
+logger = get_logger()
+
+TILE_SIZE = 256
+MAX_ZOOM = 18
+EARTH_CIRCUMFERENCE_KM = 40075.016686
+MIN_RADIUS = 0.71
+VERSION_PATTERN = re.compile(r"^[0-9a-f]{16}$")
+
+TECHNOLOGY_COLORS = {
+    "2G": (31, 119, 180, 140),
+    "3G": (255, 127, 14, 140),
+    "4G": (44, 160, 44, 140),
+}
+
+TileKey = Tuple[str, str, str, int, int, int]
+
+
+def to_mercator(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Project GPS coordinates to the normalized Web Mercator plane: (u, v) in [0, 1]."""
+    latitudes = np.radians(np.asarray(latitudes, dtype=np.float64))
+    u = (np.asarray(longitudes, dtype=np.float64) + 180.0) / 360.0
+    v = (1.0 - np.log(np.tan(latitudes) + 1.0 / np.cos(latitudes)) / math.pi) / 2.0
+    return np.column_stack([u, v])
+
+
+def tile_latitude(z: int, y: float) -> float:
+    """Latitude of the tile row y (fractional rows allowed) at zoom z."""
+    n = math.pi - 2.0 * math.pi * y / (1 << z)
+    return math.degrees(math.atan(math.sinh(n)))
+
+
+def tile_range(z: int, latitude: float, longitude: float) -> Tuple[int, int]:
+    """Column and row of the tile containing the point at zoom z."""
+    u, v = to_mercator([latitude], [longitude])[0]
+    n = 1 << z
+    return min(int(u * n), n - 1), min(int(v * n), n - 1)
+
+
+def rasterize_sites(pixels: np.ndarray, radius: float) -> np.ndarray:
+    """Compute the tile mask of the pixels within `radius` pixels of the sites.
+
+    Each site disk is split into one span of columns per tile row, the spans of all the sites
+    are filled at once with a difference array, so the cost does not depend on the radius.
+
+    Args:
+        pixels (np.ndarray): (n, 2) site positions in tile pixel coordinates.
+        radius (float): The coverage radius in pixels.
+    """
+    if len(pixels) == 0:
+        return np.zeros((TILE_SIZE, TILE_SIZE), dtype=bool)
+    # Keep at least the pixel containing the site
+    radius = max(radius, MIN_RADIUS)
+    site_x, site_y = pixels[:, 0, np.newaxis], pixels[:, 1, np.newaxis]
+    # Only the tile rows crossed by the site disks are considered
+    n_rows = min(TILE_SIZE, 2 * math.ceil(radius) + 2)
+    if n_rows == TILE_SIZE:
+        rows = np.broadcast_to(np.arange(TILE_SIZE), (len(pixels), TILE_SIZE))
+    else:
+        first_rows = np.floor(site_y).astype(np.int64) - math.ceil(radius)
+        rows = first_rows + np.arange(n_rows)[np.newaxis, :]
+    dy = rows + 0.5 - site_y
+    half_width = np.sqrt(np.maximum(radius**2 - dy**2, 0.0))
+    starts = np.clip(np.ceil(site_x - half_width - 0.5), 0, TILE_SIZE).astype(np.int64)
+    ends = np.clip(np.floor(site_x + half_width - 0.5) + 1, 0, TILE_SIZE).astype(
+        np.int64
+    )
+    spans = (np.abs(dy) <= radius) & (starts < ends) & (rows >= 0) & (rows < TILE_SIZE)
+
+    width = TILE_SIZE + 1
+    size = TILE_SIZE * width
+    offsets = rows[spans] * width
+    diff = np.bincount(offsets + starts[spans], minlength=size) - np.bincount(
+        offsets + ends[spans], minlength=size
+    )
+    return np.cumsum(diff.reshape(TILE_SIZE, width), axis=1)[:, :TILE_SIZE] > 0
+
+
+def encode_png(image: np.ndarray) -> bytes:
+    """Encode an RGBA uint8 image of shape (height, width, 4) as PNG."""
+    height, width, _ = image.shape
+    # Each scanline starts with the filter type byte (0: no filter)
+    scanlines = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    scanlines[:, 1:] = image.reshape(height, width * 4)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + tag
+            + data
+            + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+        )
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(scanlines.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def get_default_cache_dir() -> Path:
+    """Per-user tiles cache directory: $XDG_CACHE_HOME/network_coverage_api/tiles, ~/.cache by default."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home, "network_coverage_api", "tiles")
+
+
+def prepare_cache_dir(cache_dir: Path) -> Path | None:
+    """Create the cache directory, private to the user (0700), if it does not exist.
+    Returns None (no on-disk cache) if it cannot be created or belongs to another user,
+    as its tiles would be served as is.
+    """
+    try:
+        cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        owner = cache_dir.stat().st_uid
+    except OSError as e:
+        logger.warning(f"Tile disk cache disabled, cannot create {cache_dir}: {e}")
+        return None
+    if hasattr(os, "getuid") and owner != os.getuid():
+        logger.warning(f"Tile disk cache disabled, {cache_dir} belongs to another user")
+        return None
+    return cache_dir
+
+
+class TileCache:
+    """Thread-safe LRU cache of rendered tiles backed by an optional on-disk cache.
+
+    The on-disk cache is shared by the processes using the same directory, but each process only indexes the
+    tiles of its dataset version (see set_version): max_disk_bytes applies per process. The least recently
+    used tiles indexed by the process are removed when it exceeds max_disk_bytes, the directories of the other
+    dataset versions are removed once unused for retention_seconds.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 2048,
+        cache_dir: Path | None = None,
+        max_disk_bytes: int | None = None,
+        retention_seconds: float = 24 * 3600,
+    ):
+        self.max_size = max_size
+        self.cache_dir = prepare_cache_dir(cache_dir) if cache_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self.retention_seconds = retention_seconds
+        self.tiles: OrderedDict[TileKey, bytes] = OrderedDict()
+        self.disk_tiles: OrderedDict[Path, int] = OrderedDict()
+        self.disk_bytes = 0
+        self.version = None
+        self.lock = threading.Lock()
+
+    def set_version(self, version: str) -> None:
+        """Use the on-disk cache for the dataset version: the existing tiles of this version are indexed,
+        the least recently modified first. The tiles of the other versions are removed if they have not
+        been used for retention_seconds, as other processes (e.g. during a rolling restart) may serve them.
+        """
+        with self.lock:
+            if version == self.version:
+                return
+            self.version = version
+            self.disk_tiles.clear()
+            self.disk_bytes = 0
+            if self.cache_dir is None:
+                return
+            self._touch_version_dir()
+            expiration = time.time() - self.retention_seconds
+            for path in self.cache_dir.iterdir():
+                # Only remove the directories of other dataset versions
+                if (
+                    path.is_dir()
+                    and VERSION_PATTERN.match(path.name)
+                    and path.name != version
+                    and path.stat().st_mtime < expiration
+                ):
+                    logger.info(f"Removing the tiles of dataset version {path.name}")
+                    shutil.rmtree(path, ignore_errors=True)
+            tiles = [
+                (tile_path.stat().st_mtime, tile_path, tile_path.stat().st_size)
+                for tile_path in (self.cache_dir / version).rglob("*.png")
+            ]
+            for _, tile_path, size in sorted(tiles):
+                self.disk_tiles[tile_path] = size
+                self.disk_bytes += size
+        self._evict_disk_tiles()
+
+    def get_tile_path(self, key: TileKey) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        version, operator, technology, z, x, y = key
+        return (
+            self.cache_dir
+            / version
+            / operator
+            / technology
+            / str(z)
+            / str(x)
+            / f"{y}.png"
+        )
+
+    def get(self, key: TileKey) -> bytes | None:
+        with self.lock:
+            if key in self.tiles:
+                self.tiles.move_to_end(key)
+                return self.tiles[key]
+        tile_path = self.get_tile_path(key)
+        if tile_path is None:
+            return None
+        try:
+            content = tile_path.read_bytes()
+        except OSError:
+            return None
+        with self.lock:
+            if tile_path in self.disk_tiles:
+                self.disk_tiles.move_to_end(tile_path)
+        self._put_in_memory(key, content)
+        return content
+
+    def put(self, key: TileKey, content: bytes) -> None:
+        self._put_in_memory(key, content)
+        tile_path = self.get_tile_path(key)
+        if tile_path is None:
+            return
+        try:
+            tile_path.parent.mkdir(parents=True, exist_ok=True)
+            temporary_path = tile_path.with_name(
+                f"{tile_path.name}.{threading.get_ident()}.tmp"
+            )
+            temporary_path.write_bytes(content)
+            os.replace(temporary_path, tile_path)
+        except OSError as e:
+            logger.warning(f"Failed to store tile {key} in {self.cache_dir}: {e}")
+            return
+        with self.lock:
+            self.disk_bytes += len(content) - self.disk_tiles.pop(tile_path, 0)
+            self.disk_tiles[tile_path] = len(content)
+            self._touch_version_dir()
+        self._evict_disk_tiles()
+
+    def _touch_version_dir(self) -> None:
+        # The version directory modification time marks its last use for the other processes
+        try:
+            version_dir = self.cache_dir / self.version
+            version_dir.mkdir(mode=0o700, exist_ok=True)
+            os.utime(version_dir)
+        except (OSError, TypeError):
+            pass
+
+    def _evict_disk_tiles(self) -> None:
+        if self.max_disk_bytes is None:
+            return
+        evicted = []
+        with self.lock:
+            while self.disk_bytes > self.max_disk_bytes and self.disk_tiles:
+                tile_path, size = self.disk_tiles.popitem(last=False)
+                self.disk_bytes -= size
+                evicted.append(tile_path)
+        for tile_path in evicted:
+            tile_path.unlink(missing_ok=True)
+
+    def _put_in_memory(self, key: TileKey, content: bytes) -> None:
+        with self.lock:
+            self.tiles[key] = content
+            self.tiles.move_to_end(key)
+            while len(self.tiles) > self.max_size:
+                self.tiles.popitem(last=False)
+
+
+class TileRenderer:
+    """Renders and caches the coverage tiles of each operator and technology."""
+
+    def __init__(
+        self,
+        map_data: MapData,
+        cache: TileCache | None = None,
+        site_radius_km: float | None = None,
+    ):
+        self.map_data = map_data
+        self._cache = cache
+        self._site_radius_km = site_radius_km
+        self.projected_sites: Dict[Tuple[Operator, str], np.ndarray] = dict()
+        # The prerendering thread and the request handlers initialize the cache and sites concurrently
+        self.lock = threading.Lock()
+
+    @property
+    def cache(self) -> TileCache:
+        with self.lock:
+            if self._cache is None:
+                cache_dir = settings.tile_cache_dir or get_default_cache_dir()
+                self._cache = TileCache(
+                    settings.tile_cache_size,
+                    Path(cache_dir),
+                    max_disk_bytes=settings.tile_cache_disk_size_mb << 20,
+                    retention_seconds=settings.tile_cache_retention_hours * 3600,
+                )
+        return self._cache
+
+    @property
+    def site_radius_km(self) -> float:
+        if self._site_radius_km is None:
+            self._site_radius_km = settings.tile_site_radius_km
+        return self._site_radius_km
+
+    def get_projected_sites(self, operator: Operator, technology: str) -> np.ndarray:
+        """Web Mercator coordinates of the operator sites providing the technology."""
+        key = (operator, technology)
+        with self.lock:
+            if key not in self.projected_sites:
+                sites = self.map_data.get_operator_data(operator)
+                positions = np.flatnonzero(
+                    sites.technologies & TECHNOLOGY_BITS[technology]
+                )
+                latitudes, longitudes = sites.get_coordinates(positions)
+                self.projected_sites[key] = to_mercator(latitudes, longitudes)
+        return self.projected_sites[key]
+
+    def get_tile(
+        self, operator: Operator, technology: str, z: int, x: int, y: int
+    ) -> bytes:
+        """Get the PNG tile from the cache, rendering it on a cache miss."""
+        version = self.map_data.get_dataset_version()
+        self.cache.set_version(version)
+        key = (version, operator.name, technology, z, x, y)
+        content = self.cache.get(key)
+        if content is None:
+            content = self.render_tile(operator, technology, z, x, y)
+            self.cache.put(key, content)
+        return content
+
+    def render_tile(
+        self, operator: Operator, technology: str, z: int, x: int, y: int
+    ) -> bytes:
+        """Render the coverage tile as PNG."""
+        scale = (1 << z) * TILE_SIZE
+        latitude = tile_latitude(z, y + 0.5)
+        km_per_pixel = EARTH_CIRCUMFERENCE_KM * math.cos(math.radians(latitude)) / scale
+        radius = self.site_radius_km / km_per_pixel
+
+        pixels = self.get_projected_sites(operator, technology) * scale
+        pixels -= (x * TILE_SIZE, y * TILE_SIZE)
+        in_tile = np.all((pixels >= -radius) & (pixels < TILE_SIZE + radius), axis=1)
+        mask = rasterize_sites(pixels[in_tile], radius)
+
+        image = np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+        image[mask] = TECHNOLOGY_COLORS[technology]
+        return encode_png(image)
+
+    @timeit
+    def prerender(self, max_zoom: int) -> int:
+        """Render the tiles covering the map borders up to max_zoom and return their number."""
+        n_tiles = 0
+        for z in range(max_zoom + 1):
+            min_x, min_y = tile_range(
+                z, settings.right_border_lat, settings.left_border_lon
+            )
+            max_x, max_y = tile_range(
+                z, settings.left_border_lat, settings.right_border_lon
+            )
+            for operator in Operator:
+                for technology in TECHNOLOGY_COLORS:
+                    for x in range(min_x, max_x + 1):
+                        for y in range(min_y, max_y + 1):
+                            self.get_tile(operator, technology, z, x, y)
+                            n_tiles += 1
+        logger.info(f"Prerendered {n_tiles} tiles up to zoom {max_zoom}")
+        return n_tiles
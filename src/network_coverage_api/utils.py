@@ -1,3 +1,4 @@
+import hashlib
 import importlib.resources
 import logging
 from functools import wraps
@@ -36,3 +37,12 @@ def get_data_path(file_name: str) -> Path:
     with importlib.resources.as_file(data_dir) as data_dir:
         data_path = data_dir.joinpath(file_name)
         return data_path
+
+
+def compute_file_hash(path: Path, block_size: int = 1 << 20) -> str:
+    """Compute the sha256 hash of the file content."""
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            file_hash.update(block)
+    return file_hash.hexdigest()
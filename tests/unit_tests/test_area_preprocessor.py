@@ -0,0 +1,116 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from network_coverage_api.map_engine.area_preprocessor import (
+    load_boundaries,
+    assign_areas,
+    compute_area_aggregates,
+    nearest_distances,
+)
+
+
+def _square(lon: float, lat: float, size: float = 1.0) -> list:
+    return [
+        [lon, lat],
+        [lon + size, lat],
+        [lon + size, lat + size],
+        [lon, lat + size],
+        [lon, lat],
+    ]
+
+
+@pytest.fixture
+def boundary_file(tmp_path):
+    features = [
+        {
+            "type": "Feature",
+            "properties": {"codePostal": "75001"},
+            "geometry": {"type": "Polygon", "coordinates": [_square(2.0, 48.0)]},
+        },
+        {
+            "type": "Feature",
+            "properties": {"codePostal": "01000"},
+            "geometry": {
+                "type": "MultiPolygon",
+                "coordinates": [
+                    [_square(4.0, 48.0), _square(4.25, 48.25, size=0.5)],
+                    [_square(6.0, 48.0)],
+                ],
+            },
+        },
+    ]
+    path = tmp_path / "areas.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+    return str(path)
+
+
+@pytest.fixture
+def operator_data():
+    return pd.DataFrame(
+        {
+            "latitude": [48.5, 48.2, 48.5, 48.9, 48.5, 40.0],
+            "longitude": [2.5, 2.1, 4.5, 4.1, 6.5, 0.0],
+            "2G": [1, 1, 1, 1, 0, 1],
+            "3G": [1, 1, 1, 1, 1, 1],
+            "4G": [1, 0, 1, 0, 1, 1],
+        },
+        index=[10, 10, 20, 20, 30, 40],
+    )
+
+
+def test_load_boundaries(boundary_file):
+    areas = load_boundaries(boundary_file, "codePostal")
+    assert [area.code for area in areas] == ["75001", "01000"]
+    assert areas[0].bounds == (2.0, 48.0, 3.0, 49.0)
+    assert areas[0].centroid == pytest.approx((48.5, 2.5))
+    assert len(areas[1].polygons) == 2
+
+
+def test_load_boundaries_codes(tmp_path):
+    polygon = {"type": "Polygon", "coordinates": [_square(2.0, 48.0)]}
+    features = [
+        {"type": "Feature", "properties": {"code": 1000}, "geometry": polygon},
+        {"type": "Feature", "properties": {"code": "2A004"}, "geometry": polygon},
+        {"type": "Feature", "properties": {"name": "Paris"}, "geometry": polygon},
+        {"type": "Feature", "properties": None, "geometry": polygon},
+    ]
+    path = tmp_path / "areas.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+    areas = load_boundaries(str(path), "code")
+    assert [area.code for area in areas] == ["01000", "2A004"]
+
+
+def test_assign_areas(boundary_file, operator_data):
+    areas = load_boundaries(boundary_file, "codePostal")
+    site_areas = assign_areas(operator_data, areas)
+    # The third site lies in the hole of the first 01000 polygon
+    assert site_areas.tolist() == ["75001", "75001", None, "01000", "01000", None]
+
+
+def test_compute_area_aggregates(boundary_file, operator_data):
+    areas = load_boundaries(boundary_file, "codePostal")
+    result = compute_area_aggregates(operator_data, areas)
+    assert result.loc["75001", "sites"] == 2
+    assert result.loc["75001", "4G_sites"] == 1
+    assert result.loc["75001", "4G_share"] == 0.5
+    assert result.loc["75001", "4G_distance"] == 0.0
+    assert result.loc["01000", "sites"] == 2
+    assert result.loc["01000", "2G_sites"] == 1
+    assert result.loc["01000", "3G_sites"] == 2
+    assert result.loc["01000", "4G_share"] == 0.5
+
+
+def test_nearest_distances():
+    distances = nearest_distances(
+        np.array([48.0, 49.0]),
+        np.array([2.0, 2.0]),
+        np.array([48.0, 50.0]),
+        np.array([2.0, 2.0]),
+        chunk_size=1,
+    )
+    assert distances[0] == 0.0
+    assert distances[1] == pytest.approx(111.2, abs=0.1)
+    assert np.isnan(nearest_distances(np.array([48.0]), np.array([2.0]), [], [])).all()
@@ -0,0 +1,114 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from network_coverage_api.api.schemas import Operator
+from network_coverage_api.map_engine import data_preprocessor
+from network_coverage_api.map_engine.data_preprocessor import (
+    build_clustered_data,
+    get_preprocessed_data,
+    run_preprocessing,
+)
+
+RAW_FILE = "raw.csv"
+RAW_DATA = """Operateur;x;y;2G;3G;4G
+20801;102980;6847973;1;1;0
+20810;103113;6848661;1;1;0
+20815;;6833539;0;1;1
+20820;103114;6848664;1;1;1
+20815;128760;6833539;0;1;1
+20801;652469;6862035;1;1;1
+20810;1031190;6297850;1;0;1
+"""
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    (tmp_path / RAW_FILE).write_text(RAW_DATA)
+    with patch.object(
+        data_preprocessor, "get_data_path", side_effect=lambda name: tmp_path / name
+    ):
+        yield tmp_path
+
+
+def test_get_preprocessed_data(data_dir):
+    get_preprocessed_data(RAW_FILE, chunk_size=2, max_workers=2)
+    operator_sizes = {
+        operator: len(pd.read_csv(data_dir / f"{operator.name}_converted.csv"))
+        for operator in Operator
+    }
+    assert operator_sizes == {
+        Operator.Orange: 2,
+        Operator.SFR: 2,
+        Operator.Free: 1,
+        Operator.Bouygue: 1,
+    }
+    orange = pd.read_csv(data_dir / "Orange_converted.csv", index_col=0)
+    assert orange.index.tolist() == [20801, 20801]
+    assert orange["2G"].dtype == int
+    assert orange.iloc[0][["latitude", "longitude"]].tolist() == [48.4566, -5.0889]
+    assert orange.iloc[1][["latitude", "longitude"]].tolist() == [48.8566, 2.3522]
+
+
+@pytest.mark.parametrize("chunks", [None, []])
+def test_preprocessing_without_data_rows(data_dir, chunks):
+    (data_dir / RAW_FILE).write_text(RAW_DATA.splitlines()[0] + "\n")
+    read_csv = pd.read_csv
+
+    def read_csv_mock(*args, **kwargs):
+        # Some pandas versions yield no chunk at all for a header-only file
+        if chunks is not None and "chunksize" in kwargs:
+            return iter(chunks)
+        return read_csv(*args, **kwargs)
+
+    with patch.object(data_preprocessor.pd, "read_csv", side_effect=read_csv_mock):
+        get_preprocessed_data(RAW_FILE, chunk_size=2, max_workers=2)
+    run_preprocessing(RAW_FILE, chunk_size=2, max_workers=2)
+    for operator in Operator:
+        data = pd.read_csv(data_dir / f"{operator.name}_datasource.csv")
+        assert data.empty
+        assert "latitude" in data.columns
+
+
+def test_run_preprocessing(data_dir):
+    run_preprocessing(RAW_FILE, chunk_size=2, max_workers=2)
+    orange = pd.read_csv(data_dir / "Orange_datasource.csv", index_col=0)
+    assert orange.index.name == "cluster"
+    assert orange.index.tolist() == [420, 434]
+    sfr = pd.read_csv(data_dir / "SFR_datasource.csv", index_col=0)
+    assert len(sfr) == 2
+    assert not list(data_dir.glob("*.tmp"))
+
+
+def test_preprocessing_is_incremental(data_dir):
+    run_preprocessing(RAW_FILE, chunk_size=2, max_workers=2)
+    with patch.object(data_preprocessor, "ProcessPoolExecutor") as executor_mock:
+        run_preprocessing(RAW_FILE, chunk_size=2, max_workers=2)
+        executor_mock.assert_not_called()
+
+
+def test_preprocessing_rebuilds_changed_input(data_dir):
+    run_preprocessing(RAW_FILE, chunk_size=2, max_workers=2)
+    with open(data_dir / RAW_FILE, "a") as f:
+        f.write("20801;128862;6844668;0;1;1\n")
+    run_preprocessing(RAW_FILE, chunk_size=2, max_workers=2)
+    orange = pd.read_csv(data_dir / "Orange_datasource.csv", index_col=0)
+    assert len(orange) == 3
+
+
+def test_clustering_rebuilds_changed_cluster_size(data_dir):
+    key = get_preprocessed_data(RAW_FILE, chunk_size=2, max_workers=2)
+    clustered_key = build_clustered_data(key, chunk_size=2, max_workers=2)
+    settings = data_preprocessor.settings
+    with patch.object(data_preprocessor, "settings") as settings_mock:
+        settings_mock.configure_mock(
+            cluster_size=2.0,
+            left_border_lat=settings.left_border_lat,
+            left_border_lon=settings.left_border_lon,
+            right_border_lat=settings.right_border_lat,
+            right_border_lon=settings.right_border_lon,
+        )
+        assert build_clustered_data(key, chunk_size=2, max_workers=2) != clustered_key
+    orange = pd.read_csv(data_dir / f"{Operator.Orange.name}_datasource.csv")
+    assert orange["cluster"].tolist() == [24, 27]
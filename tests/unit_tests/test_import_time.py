@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Import time budget of the API module in seconds, can be adjusted for slow CI machines.
+IMPORT_TIME_BUDGET = float(os.environ.get("IMPORT_TIME_BUDGET", 1.0))
+
+LAZY_MODULES = [
+    "matplotlib",
+    "pyproj",
+    "geopy",
+    "dynaconf",
+    "uvicorn",
+    "network_coverage_api.map_engine.data_preprocessor",
+    "network_coverage_api.map_engine.area_preprocessor",
+]
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import network_coverage_api.api.main
+duration = time.perf_counter() - start
+print(json.dumps(dict(
+    duration=duration,
+    modules=[module for module in {LAZY_MODULES!r} if module in sys.modules],
+)))
+"""
+
+
+def import_main() -> dict:
+    """Import the API module in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.fixture(scope="module")
+def import_results():
+    # The first import warms up the file system cache
+    return [import_main() for _ in range(3)]
+
+
+def test_lazy_modules_are_not_imported(import_results):
+    assert import_results[-1]["modules"] == []
+
+
+def test_import_time_budget(import_results):
+    duration = min(result["duration"] for result in import_results[1:])
+    assert duration < IMPORT_TIME_BUDGET
@@ -0,0 +1,97 @@
+import random
+from unittest.mock import patch
+
+import pytest
+
+from network_coverage_api.api.geocoding import geocode, geocode_reverse
+from network_coverage_api.api.schemas import Address
+from network_coverage_api.load_test.fake_ban import (
+    FakeBANServer,
+    LatencyProfile,
+    search_location,
+)
+from network_coverage_api.load_test.runner import (
+    RequestResult,
+    build_report,
+    build_request_url,
+    parse_args,
+)
+
+
+@pytest.fixture
+def ban_server():
+    with FakeBANServer(seed=0) as server:
+        with patch("network_coverage_api.api.geocoding.settings") as settings_mock:
+            settings_mock.ban_domain = server.domain
+            settings_mock.ban_scheme = "http"
+            yield server
+
+
+def test_fake_ban_geocode(ban_server):
+    location = geocode(Address(postal_code="67000"))
+    assert location.address == "Place Kléber 67000 Strasbourg"
+    assert (location.latitude, location.longitude) == (48.583412, 7.745789)
+
+
+def test_fake_ban_geocode_reverse(ban_server):
+    location = geocode_reverse(48.5, 2.25)
+    assert location.address == "Fake address 48.5000 2.2500"
+
+
+def test_fake_ban_errors(ban_server):
+    ban_server.profile = LatencyProfile(error_rate=1.0)
+    assert geocode(Address(city="Paris"), n_tries=2) is None
+
+
+def test_search_location_is_deterministic():
+    assert search_location("1 Rue Inconnue") == search_location("1 Rue Inconnue")
+    assert search_location("Place Bellecour lyon")[2] == "Lyon"
+
+
+@pytest.mark.parametrize(
+    "profile, min_delay, max_delay",
+    [
+        (LatencyProfile(), 0.0, 0.0),
+        (LatencyProfile(base_ms=10), 0.01, 0.01),
+        (LatencyProfile(base_ms=10, tail_ms=100, tail_rate=1.0), 0.11, 0.11),
+    ],
+)
+def test_latency_profile_sample_delay(profile, min_delay, max_delay):
+    delay = profile.sample_delay(random.Random(0))
+    assert min_delay <= delay <= max_delay
+
+
+def test_build_report():
+    results = [
+        RequestResult("coverage", 0.0, latency / 1000, 200) for latency in range(1, 101)
+    ]
+    results += [
+        RequestResult("area", 0.0, 0.5, 404),
+        RequestResult("area", 0.0, 0.5, None),
+    ]
+    reports = {report.endpoint: report for report in build_report(results, 10.0)}
+    assert reports["coverage"].requests == 100
+    assert reports["coverage"].errors == 0
+    assert reports["coverage"].throughput == 10.0
+    assert reports["coverage"].p50 == pytest.approx(50.5)
+    assert reports["coverage"].p99 == pytest.approx(99.01)
+    assert reports["area"].errors == 2
+    assert reports["area"].throughput == 0.0
+
+
+def test_build_request_url():
+    assert build_request_url("area", 2) == "/network_coverage/area/67000"
+    assert (
+        build_request_url("coverage", 0)
+        == "/network_coverage/?postal_code=75004&city=Paris"
+    )
+
+
+def test_parse_args():
+    config = parse_args(
+        ["--rate", "100", "--profile", "slow", "--error-rate", "0.2", "--workers", "4"]
+    )
+    assert config.rate == 100
+    assert config.workers == 4
+    assert config.profile.base_ms == 150
+    assert config.profile.error_rate == 0.2
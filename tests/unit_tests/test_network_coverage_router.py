@@ -4,14 +4,24 @@ from fastapi.testclient import TestClient
 import pytest
 
 from network_coverage_api.api.main import app
-from network_coverage_api.api.network_coverage_router import _get_network_coverage
+from network_coverage_api.api.network_coverage_router import (
+    _get_network_coverage,
+    _get_area_network_coverage,
+    _get_route_network_coverage,
+)
 from network_coverage_api.api.schemas import (
     Operator,
     NetworkCoverage,
     NetworkCoverageDetailed,
     Location,
     Address,
+    AreaNetworkCoverage,
+    RouteRequest,
+    RouteNetworkCoverage,
+    CoverageSegment,
 )
+from network_coverage_api.map_engine.route_profile import CoverageRun
+from network_coverage_api.map_engine.map_data import AreaData
 
 client = TestClient(app)
 
@@ -153,3 +163,286 @@ def test__get_network_coverage(
                 ]
             )
             assert result == [detailed_nc_mock.return_value]
+
+
+@pytest.mark.parametrize(
+    "area_coverage, status_code, response_json",
+    [
+        (
+            [
+                AreaNetworkCoverage(
+                    operator=Operator.SFR,
+                    sites=4,
+                    N2G_sites=4,
+                    N3G_sites=3,
+                    N4G_sites=2,
+                    N4G_share=0.5,
+                    N2G_distance=0.1,
+                    N3G_distance=0.2,
+                    N4G_distance=None,
+                )
+            ],
+            200,
+            [
+                {
+                    "operator": "SFR",
+                    "sites": 4,
+                    "2G_sites": 4,
+                    "3G_sites": 3,
+                    "4G_sites": 2,
+                    "4G_share": 0.5,
+                    "2G_distance": 0.1,
+                    "3G_distance": 0.2,
+                    "4G_distance": None,
+                }
+            ],
+        ),
+        (None, 404, {"detail": "No coverage data for area 92200"}),
+    ],
+)
+@patch("network_coverage_api.api.network_coverage_router._get_area_network_coverage")
+def test_get_area_network_coverage(
+    get_area_coverage_mock, area_coverage, status_code, response_json
+):
+    get_area_coverage_mock.return_value = area_coverage
+    response = client.get("/network_coverage/area/92200")
+    get_area_coverage_mock.assert_called_with("92200")
+    assert response.status_code == status_code
+    assert response.json() == response_json
+
+
+@patch("network_coverage_api.map_engine.map_data.get_data_path")
+def test_get_area_network_coverage_not_built(get_data_path_mock, tmp_path):
+    get_data_path_mock.return_value = tmp_path / "area_datasource.csv"
+    with patch(
+        "network_coverage_api.api.network_coverage_router.area_data", new=AreaData()
+    ):
+        response = client.get("/network_coverage/area/75001")
+    assert response.status_code == 503
+    assert "not built" in response.json()["detail"]
+
+
+@pytest.mark.parametrize(
+    "area_code, status_code",
+    [("75001", 404), ("2A004", 404), ("7500", 422), ("2C004", 422), ("750011", 422)],
+)
+@patch("network_coverage_api.api.network_coverage_router._get_area_network_coverage")
+def test_get_area_network_coverage_area_code(
+    get_area_coverage_mock, area_code, status_code
+):
+    get_area_coverage_mock.return_value = None
+    response = client.get(f"/network_coverage/area/{area_code}")
+    assert response.status_code == status_code
+
+
+@pytest.mark.parametrize(
+    "records, expected",
+    [
+        (None, None),
+        (
+            [
+                {
+                    "operator": "Free",
+                    "sites": 0,
+                    "2G_sites": 0,
+                    "3G_sites": 0,
+                    "4G_sites": 0,
+                    "4G_share": 0.0,
+                    "2G_distance": None,
+                    "3G_distance": 1.5,
+                    "4G_distance": 1.5,
+                }
+            ],
+            [
+                AreaNetworkCoverage(
+                    operator=Operator.Free,
+                    sites=0,
+                    N2G_sites=0,
+                    N3G_sites=0,
+                    N4G_sites=0,
+                    N4G_share=0.0,
+                    N2G_distance=None,
+                    N3G_distance=1.5,
+                    N4G_distance=1.5,
+                )
+            ],
+        ),
+    ],
+)
+@patch("network_coverage_api.api.network_coverage_router.area_data")
+def test__get_area_network_coverage(area_data_mock, records, expected):
+    area_data_mock.get_area_coverage.return_value = records
+    assert _get_area_network_coverage("92200") == expected
+    area_data_mock.get_area_coverage.assert_called_once_with("92200")
+
+
+@patch("network_coverage_api.api.network_coverage_router.map_data")
+@patch("network_coverage_api.api.network_coverage_router.tile_renderer")
+def test_get_coverage_tile(tile_renderer_mock, map_data_mock):
+    tile_renderer_mock.get_tile.return_value = b"png"
+    map_data_mock.get_dataset_version.return_value = "v1"
+    response = client.get("/network_coverage/tiles/SFR/4G/5/16/11.png")
+    tile_renderer_mock.get_tile.assert_called_with(Operator.SFR, "4G", 5, 16, 11)
+    assert response.status_code == 200
+    assert response.content == b"png"
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == '"v1"'
+
+
+@pytest.mark.parametrize(
+    "if_none_match, status_code",
+    [('"v1"', 304), ('W/"v0", W/"v1"', 304), ("*", 304), ('"v0"', 200)],
+)
+@patch("network_coverage_api.api.network_coverage_router.map_data")
+@patch("network_coverage_api.api.network_coverage_router.tile_renderer")
+def test_get_coverage_tile_revalidation(
+    tile_renderer_mock, map_data_mock, if_none_match, status_code
+):
+    tile_renderer_mock.get_tile.return_value = b"png"
+    map_data_mock.get_dataset_version.return_value = "v1"
+    response = client.get(
+        "/network_coverage/tiles/SFR/4G/5/16/11.png",
+        headers={"If-None-Match": if_none_match},
+    )
+    assert response.status_code == status_code
+    assert response.headers["etag"] == '"v1"'
+    assert response.headers["cache-control"] == "public, no-cache"
+    if status_code == 304:
+        assert response.content == b""
+        tile_renderer_mock.get_tile.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "url, status_code",
+    [
+        ("/network_coverage/tiles/SFR/4G/1/2/0.png", 404),
+        ("/network_coverage/tiles/SFR/5G/1/0/0.png", 422),
+        ("/network_coverage/tiles/Unknown/4G/1/0/0.png", 422),
+        ("/network_coverage/tiles/SFR/4G/19/0/0.png", 422),
+    ],
+)
+@patch("network_coverage_api.api.network_coverage_router.tile_renderer")
+def test_get_coverage_tile_invalid(tile_renderer_mock, url, status_code):
+    response = client.get(url)
+    assert response.status_code == status_code
+    tile_renderer_mock.get_tile.assert_not_called()
+
+
+@patch("network_coverage_api.api.network_coverage_router._get_route_network_coverage")
+def test_get_route_network_coverage(get_route_coverage_mock):
+    get_route_coverage_mock.return_value = [
+        RouteNetworkCoverage(
+            operator=Operator.SFR,
+            segments=[
+                CoverageSegment(start_km=0.0, end_km=1.5, N2G=True, N3G=True, N4G=False)
+            ],
+        )
+    ]
+    response = client.post(
+        "/network_coverage/route",
+        json={"polyline": [[48.85, 2.35], [48.86, 2.36]], "spacing_km": 0.5},
+    )
+    get_route_coverage_mock.assert_called_with(
+        RouteRequest(polyline=[(48.85, 2.35), (48.86, 2.36)], spacing_km=0.5)
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "operator": "SFR",
+            "segments": [
+                {"start_km": 0.0, "end_km": 1.5, "2G": True, "3G": True, "4G": False}
+            ],
+        }
+    ]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {},
+        {"polyline": [[48.85, 2.35]]},
+        {"polyline": [[48.85, 2.35], [48.86, 2.36]], "gpx": "<gpx/>"},
+        {"polyline": [[48.85, 2.35], [48.86, 2.36]], "spacing_km": 0},
+        {"gpx": "<gpx>"},
+        {"polyline": [[48.8, 2.3], [148.8, 2.3]]},
+        {"polyline": [[48.8, 2.3], [48.8, 182.3]]},
+    ],
+)
+def test_get_route_network_coverage_invalid(body):
+    response = client.post("/network_coverage/route", json=body)
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        '{"polyline": [[48.8, 2.3], [Infinity, 2.3]]}',
+        '{"polyline": [[48.8, 2.3], [NaN, 2.3]]}',
+        '{"polyline": [[48.8, 2.3], [48.9, 2.3]], "max_distance_km": Infinity}',
+        '{"polyline": [[48.8, 2.3], [48.9, 2.3]], "spacing_km": Infinity}',
+    ],
+)
+@patch("network_coverage_api.api.network_coverage_router.route_profiler")
+def test_get_route_network_coverage_not_finite(route_profiler_mock, content):
+    response = client.post(
+        "/network_coverage/route",
+        content=content,
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 422
+    route_profiler_mock.get_route_coverage.assert_not_called()
+
+
+@patch("network_coverage_api.api.network_coverage_router.route_profiler")
+def test_get_route_network_coverage_max_distance_limit(route_profiler_mock):
+    response = client.post(
+        "/network_coverage/route",
+        json={"polyline": [[48.85, 2.35], [48.86, 2.36]], "max_distance_km": 1e5},
+    )
+    assert response.status_code == 422
+    assert "max_distance_km must not exceed" in response.json()["detail"]
+    route_profiler_mock.get_route_coverage.assert_not_called()
+
+
+@patch("network_coverage_api.api.network_coverage_router.Operator", new=[Operator.Free])
+@patch("network_coverage_api.api.network_coverage_router.route_profiler")
+def test__get_route_network_coverage(route_profiler_mock):
+    route_profiler_mock.get_route_coverage.return_value = {
+        Operator.Free: [
+            CoverageRun(0.0, 0.4, {"2G": False, "3G": True, "4G": True}),
+        ]
+    }
+    gpx = '<gpx><trk><trkpt lat="48.85" lon="2.35"/><trkpt lat="48.86" lon="2.36"/></trk></gpx>'
+    result = _get_route_network_coverage(
+        RouteRequest(gpx=gpx, spacing_km=0.2, max_distance_km=1.0)
+    )
+    points, spacing_km, max_distance_km = (
+        route_profiler_mock.get_route_coverage.call_args.args
+    )
+    assert points.tolist() == [[48.85, 2.35], [48.86, 2.36]]
+    assert (spacing_km, max_distance_km) == (0.2, 1.0)
+    assert result == [
+        RouteNetworkCoverage(
+            operator=Operator.Free,
+            segments=[
+                CoverageSegment(start_km=0.0, end_km=0.4, N2G=False, N3G=True, N4G=True)
+            ],
+        )
+    ]
+
+
+@patch("network_coverage_api.api.network_coverage_router.search_flight")
+def test_get_coalescing_metrics(search_flight_mock):
+    search_flight_mock.get_metrics.return_value = dict(
+        name="search",
+        calls=5,
+        executions=2,
+        coalesced=3,
+        max_waiters=3,
+        in_flight={"3f2a9c1d7b6e": 2},
+    )
+    response = client.get("/network_coverage/metrics/coalescing")
+    assert response.status_code == 200
+    metrics = {flight["name"]: flight for flight in response.json()}
+    assert list(metrics) == ["geocode", "geocode_reverse", "search"]
+    assert metrics["search"] == search_flight_mock.get_metrics.return_value
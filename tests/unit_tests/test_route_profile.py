@@ -0,0 +1,145 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from network_coverage_api.api.schemas import Operator
+from network_coverage_api.map_engine.map_searcher import haversine_distance
+from network_coverage_api.map_engine.site_store import OperatorSites
+from network_coverage_api.map_engine.route_profile import (
+    CoverageRun,
+    RouteProfiler,
+    SiteGridIndex,
+    parse_gpx,
+    resample_route,
+    run_length_encode,
+)
+
+GPX = """<?xml version="1.0" encoding="UTF-8"?>
+<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">
+  <trk><trkseg>
+    <trkpt lat="48.8566" lon="2.3522"><ele>35</ele></trkpt>
+    <trkpt lat="48.8600" lon="2.4000"/>
+  </trkseg></trk>
+</gpx>
+"""
+
+
+def test_parse_gpx():
+    assert parse_gpx(GPX).tolist() == [[48.8566, 2.3522], [48.86, 2.4]]
+    route = '<gpx><rte><rtept lat="1.0" lon="2.0"/><rtept lat="3" lon="4"/></rte></gpx>'
+    assert parse_gpx(route).tolist() == [[1.0, 2.0], [3.0, 4.0]]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "<gpx>",
+        "<gpx><trk/></gpx>",
+        '<gpx><trk><trkpt lat="1.0"/></trk></gpx>',
+        '<gpx><trk><trkpt lat="148.8" lon="2.3"/></trk></gpx>',
+        '<gpx><trk><trkpt lat="48.8" lon="-180.5"/></trk></gpx>',
+        '<gpx><trk><trkpt lat="inf" lon="2.3"/></trk></gpx>',
+        '<gpx><trk><trkpt lat="nan" lon="2.3"/></trk></gpx>',
+    ],
+)
+def test_parse_gpx_invalid(content):
+    with pytest.raises(ValueError):
+        parse_gpx(content)
+
+
+def test_resample_route():
+    points = np.array([[45.0, 2.0], [45.0, 2.01], [45.01, 2.01]])
+    latitudes, longitudes, distances = resample_route(points, 0.5)
+    length = haversine_distance(45.0, 2.0, 45.0, 2.01) + haversine_distance(
+        45.0, 2.01, 45.01, 2.01
+    )
+    assert distances[-1] == pytest.approx(length)
+    assert np.allclose(np.diff(distances[:-1]), 0.5)
+    assert latitudes[[0, -1]] == pytest.approx([45.0, 45.01])
+    assert longitudes[[0, -1]] == pytest.approx([2.0, 2.01])
+
+
+def test_run_length_encode():
+    distances = np.array([0.0, 1.0, 2.0, 3.0, 3.5])
+    coverage = np.array(
+        [[1, 1, 1], [1, 1, 1], [1, 1, 0], [1, 1, 0], [0, 0, 0]], dtype=bool
+    )
+    assert run_length_encode(distances, coverage) == [
+        CoverageRun(0.0, 2.0, {"2G": True, "3G": True, "4G": True}),
+        CoverageRun(2.0, 3.5, {"2G": True, "3G": True, "4G": False}),
+        CoverageRun(3.5, 3.5, {"2G": False, "3G": False, "4G": False}),
+    ]
+
+
+@pytest.mark.parametrize("max_distance_km", [0.5, 2.0, 5.0])
+def test_site_grid_index(max_distance_km):
+    rng = np.random.default_rng(0)
+    site_latitudes = rng.uniform(48.0, 48.5, 500)
+    site_longitudes = rng.uniform(2.0, 2.5, 500)
+    latitudes = rng.uniform(47.9, 48.6, 200)
+    longitudes = rng.uniform(1.9, 2.6, 200)
+
+    index = SiteGridIndex(site_latitudes, site_longitudes, cell_km=2.0)
+    expected = haversine_distance(
+        latitudes[:, np.newaxis],
+        longitudes[:, np.newaxis],
+        site_latitudes[np.newaxis, :],
+        site_longitudes[np.newaxis, :],
+    ).min(axis=1)
+    expected[expected > max_distance_km] = np.inf
+    result = index.nearest_distances(latitudes, longitudes, max_distance_km)
+    assert np.array_equal(np.isinf(result), np.isinf(expected))
+    assert np.allclose(result[np.isfinite(result)], expected[np.isfinite(expected)])
+
+
+def test_site_grid_index_max_distance():
+    index = SiteGridIndex(np.ones(3), np.ones(3), cell_km=2.0)
+    with pytest.raises(ValueError):
+        index.nearest_distances(np.ones(3), np.ones(3), 1e5)
+
+
+def test_site_grid_index_no_sites():
+    index = SiteGridIndex(np.empty(0), np.empty(0), cell_km=2.0)
+    assert np.isinf(index.nearest_distances(np.ones(3), np.ones(3), 2.0)).all()
+
+
+@pytest.fixture
+def profiler():
+    sites = OperatorSites(
+        latitudes=np.array([45.0, 45.0], dtype=np.float32),
+        longitudes=np.array([2.0, 2.1], dtype=np.float32),
+        site_ids=np.array([0, 1], dtype=np.int32),
+        technologies=np.array([0b111, 0b011], dtype=np.uint8),
+        cluster_ids=np.array([0], dtype=np.int32),
+        cluster_offsets=np.array([0, 2], dtype=np.int32),
+    )
+    map_data = Mock()
+    map_data.get_operator_data.return_value = sites
+    return RouteProfiler(map_data, cell_km=1.0)
+
+
+def test_get_route_coverage(profiler):
+    # From the 4G site to the 3G site, 7.9 km apart
+    points = np.array([[45.0, 2.0], [45.0, 2.1]])
+    coverage = profiler.get_route_coverage(points, 0.1, 0.95)
+    assert list(coverage) == list(Operator)
+    runs = coverage[Operator.SFR]
+    assert [run.coverage for run in runs] == [
+        {"2G": True, "3G": True, "4G": True},
+        {"2G": False, "3G": False, "4G": False},
+        {"2G": True, "3G": True, "4G": False},
+    ]
+    assert runs[0].start_km == 0.0
+    assert runs[0].end_km == pytest.approx(1.0)
+    assert runs[-1].start_km == pytest.approx(7.0)
+    assert runs[-1].end_km == pytest.approx(7.863, abs=1e-3)
+
+
+def test_get_route_coverage_invalid(profiler):
+    with pytest.raises(ValueError):
+        profiler.get_route_coverage(np.array([[45.0, 2.0]]), 0.1, 1.0)
+    with pytest.raises(ValueError):
+        profiler.get_route_coverage(
+            np.array([[45.0, 2.0], [45.0, 2.1]]), 0.1, 1.0, max_samples=10
+        )
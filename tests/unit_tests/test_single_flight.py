@@ -0,0 +1,70 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from network_coverage_api.api.single_flight import SingleFlight
+
+
+def wait_for_waiters(flight: SingleFlight, key, n_waiters: int) -> None:
+    for _ in range(1000):
+        if flight.get_metrics()["in_flight"].get(flight.get_key_hash(key)) == n_waiters:
+            return
+        threading.Event().wait(0.005)
+    raise TimeoutError(f"{n_waiters} waiters expected for {key}")
+
+
+def test_single_flight_coalesces_calls():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    executed = []
+
+    def function(value):
+        executed.append(value)
+        release.wait(5)
+        return value * 2
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(flight.do, "key", function, 21) for _ in range(3)]
+        other = executor.submit(flight.do, "other", function, 1)
+        wait_for_waiters(flight, "key", 3)
+        in_flight = flight.get_metrics()["in_flight"]
+        assert in_flight == {
+            flight.get_key_hash("key"): 3,
+            flight.get_key_hash("other"): 1,
+        }
+        assert "key" not in in_flight
+        release.set()
+        assert [future.result() for future in futures] == [42, 42, 42]
+        assert other.result() == 2
+
+    assert sorted(executed) == [1, 21]
+    assert flight.get_metrics() == dict(
+        name="test",
+        calls=4,
+        executions=2,
+        coalesced=2,
+        max_waiters=3,
+        in_flight={},
+    )
+    # Once finished, a call with the same key is executed again
+    assert flight.do("key", function, 1) == 2
+    assert flight.get_metrics()["executions"] == 3
+
+
+def test_single_flight_shares_exception():
+    flight = SingleFlight("test")
+    release = threading.Event()
+
+    def function():
+        release.wait(5)
+        raise ValueError("failed")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(flight.do, "key", function) for _ in range(2)]
+        wait_for_waiters(flight, "key", 2)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError, match="failed"):
+                future.result()
+    assert flight.get_metrics()["in_flight"] == {}
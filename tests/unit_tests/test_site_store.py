@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from network_coverage_api.api.schemas import Operator
+from network_coverage_api.map_engine.map_searcher import (
+    MapConfig,
+    MapPoint,
+    MapSearcher,
+)
+from network_coverage_api.map_engine.site_store import (
+    SiteStore,
+    pack_technologies,
+    unpack_technologies,
+)
+
+COLUMNS = ["cluster", "2G", "3G", "4G", "latitude", "longitude"]
+
+
+@pytest.fixture
+def site_store():
+    frames = {
+        Operator.SFR: pd.DataFrame(
+            [
+                [0, 1, 1, 0, 48.4629, -5.088],
+                [1, 1, 1, 1, 48.37, -4.7489],
+                [3, 0, 0, 1, 48.9, -4.9],
+            ],
+            columns=COLUMNS,
+        ).set_index("cluster"),
+        Operator.Bouygue: pd.DataFrame(
+            [[0, 1, 1, 1, 48.4629, -5.088]], columns=COLUMNS
+        ).set_index("cluster"),
+    }
+    return SiteStore.from_frames(frames)
+
+
+def test_pack_technologies():
+    data = pd.DataFrame({"2G": [1, 0, 1], "3G": [0, 1, 1], "4G": [0, 1, 1]})
+    packed = pack_technologies(data)
+    assert packed.dtype == np.uint8
+    assert packed.tolist() == [1, 6, 7]
+    assert unpack_technologies(6) == {"2G": False, "3G": True, "4G": True}
+
+
+def test_site_store_deduplicates_sites(site_store):
+    assert len(site_store) == 3
+    assert site_store.latitudes.dtype == np.float32
+    sfr = site_store.get_operator_sites(Operator.SFR)
+    bouygue = site_store.get_operator_sites(Operator.Bouygue)
+    assert len(sfr) == 3
+    assert bouygue.site_ids.tolist() == [sfr.site_ids[0]]
+    assert sfr.technologies[0] != bouygue.technologies[0]
+
+
+def test_operator_sites_clusters(site_store):
+    sfr = site_store.get_operator_sites(Operator.SFR)
+    assert sfr.cluster_ids.tolist() == [0, 1, 3]
+    assert sfr.get_cluster_range(0) == (0, 1)
+    assert sfr.get_cluster_range(3) == (2, 3)
+    assert sfr.get_cluster_range(2) == (0, 0)
+    assert sfr.get_cluster_range(10) == (0, 0)
+    assert sfr.get_site_data(1) == {
+        "2G": True,
+        "3G": True,
+        "4G": True,
+        "latitude": 48.37,
+        "longitude": -4.7489,
+    }
+
+
+def test_find_closest_point_data(site_store):
+    config = MapConfig(MapPoint(48.0, -5.5), MapPoint(49.0, -4.5))
+    searcher = MapSearcher(config, cluster_size=0.5)
+    sfr = site_store.get_operator_sites(Operator.SFR)
+
+    result = searcher.find_closest_point_data(MapPoint(48.46, -5.08), sfr)
+    assert result.point == MapPoint(48.4629, -5.088)
+    assert result.data["4G"] is False
+    assert result.distance == pytest.approx(0.67, abs=0.01)
+
+    assert searcher.find_closest_point_data(MapPoint(48.7, -5.3), sfr) is None
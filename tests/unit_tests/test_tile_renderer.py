@@ -0,0 +1,180 @@
+import os
+import stat
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from network_coverage_api.api.schemas import Operator
+from network_coverage_api.map_engine import tile_renderer
+from network_coverage_api.map_engine.site_store import OperatorSites
+from network_coverage_api.map_engine.tile_renderer import (
+    TILE_SIZE,
+    TileCache,
+    TileRenderer,
+    encode_png,
+    get_default_cache_dir,
+    rasterize_sites,
+    tile_range,
+    to_mercator,
+)
+
+
+def decode_png(content: bytes) -> np.ndarray:
+    assert content[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", content[16:24])
+    idat_length = struct.unpack(">I", content[33:37])[0]
+    assert content[37:41] == b"IDAT"
+    raw = zlib.decompress(content[41 : 41 + idat_length])
+    scanlines = np.frombuffer(raw, dtype=np.uint8).reshape(height, width * 4 + 1)
+    return scanlines[:, 1:].reshape(height, width, 4)
+
+
+@pytest.mark.parametrize("radius", [0.2, 3.5, 40.0, 300.0])
+def test_rasterize_sites(radius):
+    pixels = np.random.default_rng(0).uniform(-50, 300, (20, 2))
+    centers = np.arange(TILE_SIZE) + 0.5
+    expected = np.zeros((TILE_SIZE, TILE_SIZE), dtype=bool)
+    for x, y in pixels:
+        expected |= (centers[:, np.newaxis] - y) ** 2 + (
+            centers[np.newaxis, :] - x
+        ) ** 2 <= max(radius, 0.71) ** 2
+    assert (rasterize_sites(pixels, radius) == expected).all()
+
+
+def test_rasterize_no_sites():
+    assert not rasterize_sites(np.empty((0, 2)), 5.0).any()
+
+
+def test_encode_png():
+    image = np.random.default_rng(0).integers(0, 255, (4, 3, 4), dtype=np.uint8)
+    assert (decode_png(encode_png(image)) == image).all()
+
+
+def test_mercator_tiles():
+    assert to_mercator([0.0], [0.0]).tolist() == [[0.5, 0.5]]
+    assert tile_range(0, 48.8566, 2.3522) == (0, 0)
+    assert tile_range(10, 48.8566, 2.3522) == (518, 352)
+
+
+def test_tile_cache(tmp_path):
+    cache = TileCache(max_size=1, cache_dir=tmp_path)
+    cache.put(("v1", "SFR", "4G", 0, 0, 0), b"first")
+    cache.put(("v1", "SFR", "4G", 1, 0, 0), b"second")
+    assert list(cache.tiles) == [("v1", "SFR", "4G", 1, 0, 0)]
+    assert (tmp_path / "v1" / "SFR" / "4G" / "0" / "0" / "0.png").exists()
+    assert cache.get(("v1", "SFR", "4G", 0, 0, 0)) == b"first"
+    assert cache.get(("v2", "SFR", "4G", 0, 0, 0)) is None
+
+
+def test_tile_cache_disk_limit(tmp_path):
+    version = "0123456789abcdef"
+    cache = TileCache(max_size=8, cache_dir=tmp_path, max_disk_bytes=10)
+    cache.set_version(version)
+    keys = [(version, "SFR", "4G", 1, 0, y) for y in range(3)]
+    cache.put(keys[0], b"first")
+    cache.put(keys[1], b"second")
+    assert not cache.get_tile_path(keys[0]).exists()
+    cache.put(keys[2], b"abc")
+    assert cache.get_tile_path(keys[1]).exists()
+    assert cache.disk_bytes == 9
+
+
+def test_tile_cache_removes_unused_versions(tmp_path):
+    old_version, recent_version, version = (
+        "0123456789abcdef",
+        "00000000000000aa",
+        "fedcba9876543210",
+    )
+    for other_version in (old_version, recent_version):
+        cache = TileCache(cache_dir=tmp_path)
+        cache.set_version(other_version)
+        cache.put((other_version, "SFR", "4G", 0, 0, 0), b"old")
+    os.utime(tmp_path / old_version, (0, 0))
+    (tmp_path / "other").mkdir()
+
+    cache = TileCache(cache_dir=tmp_path, max_disk_bytes=100)
+    cache.put((version, "SFR", "4G", 0, 0, 0), b"new")
+    cache.set_version(version)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        recent_version,
+        version,
+        "other",
+    ]
+    assert cache.disk_bytes == 3
+
+
+def test_tile_cache_dir_is_private(tmp_path):
+    cache = TileCache(cache_dir=tmp_path / "cache" / "tiles")
+    assert cache.cache_dir == tmp_path / "cache" / "tiles"
+    assert stat.S_IMODE(cache.cache_dir.stat().st_mode) == 0o700
+    with patch("os.getuid", return_value=os.getuid() + 1):
+        assert TileCache(cache_dir=tmp_path / "cache" / "tiles").cache_dir is None
+
+
+def test_default_cache_dir(tmp_path):
+    with patch.dict(os.environ, {"XDG_CACHE_HOME": str(tmp_path)}):
+        assert get_default_cache_dir() == tmp_path / "network_coverage_api" / "tiles"
+
+
+@pytest.fixture
+def renderer():
+    latitudes = np.array([48.8566, 43.2965], dtype=np.float32)
+    longitudes = np.array([2.3522, 5.3698], dtype=np.float32)
+    sites = OperatorSites(
+        latitudes=latitudes,
+        longitudes=longitudes,
+        site_ids=np.array([0, 1], dtype=np.int32),
+        technologies=np.array([0b111, 0b011], dtype=np.uint8),
+        cluster_ids=np.array([0], dtype=np.int32),
+        cluster_offsets=np.array([0, 2], dtype=np.int32),
+    )
+    map_data = Mock()
+    map_data.get_operator_data.return_value = sites
+    map_data.get_dataset_version.return_value = "v1"
+    return TileRenderer(map_data, TileCache(max_size=8), site_radius_km=2.0)
+
+
+def test_render_tile(renderer):
+    x, y = tile_range(10, 48.8566, 2.3522)
+    image = decode_png(renderer.render_tile(Operator.SFR, "4G", 10, x, y))
+    assert image.shape == (TILE_SIZE, TILE_SIZE, 4)
+    assert image[..., 3].any()
+
+    x, y = tile_range(10, 43.2965, 5.3698)
+    image = decode_png(renderer.render_tile(Operator.SFR, "4G", 10, x, y))
+    assert not image[..., 3].any()
+    image = decode_png(renderer.render_tile(Operator.SFR, "3G", 10, x, y))
+    assert image[..., 3].any()
+
+
+def test_get_tile_is_cached(renderer):
+    content = renderer.get_tile(Operator.SFR, "4G", 5, 16, 11)
+    assert renderer.cache.get(("v1", "SFR", "4G", 5, 16, 11)) == content
+    renderer.render_tile = Mock()
+    assert renderer.get_tile(Operator.SFR, "4G", 5, 16, 11) == content
+    renderer.render_tile.assert_not_called()
+
+
+def test_renderer_lazy_initialization_is_thread_safe(renderer, tmp_path):
+    renderer._cache = None
+    settings_mock = Mock(
+        tile_cache_dir=str(tmp_path),
+        tile_cache_size=8,
+        tile_cache_disk_size_mb=1,
+        tile_cache_retention_hours=1,
+    )
+    with patch.object(tile_renderer, "settings", settings_mock):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            caches = list(executor.map(lambda _: renderer.cache, range(32)))
+            sites = list(
+                executor.map(
+                    lambda _: renderer.get_projected_sites(Operator.SFR, "4G"),
+                    range(32),
+                )
+            )
+    assert all(cache is caches[0] for cache in caches)
+    assert all(projected is sites[0] for projected in sites)